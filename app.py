@@ -17,6 +17,11 @@ from routes.analytics import analytics_bp
 from routes.community import community_bp
 from routes.host import host_bp
 from routes.admin import admin_bp
+from commands import register_commands
+from models.space import add_sample_spaces
+from models.suggestions import resume_suggestion_jobs
+from models.session_store import make_session_interface
+from models.user import db
 
 load_dotenv()
 
@@ -26,6 +31,11 @@ def create_app():
     
     app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'a-default-secret-key')
 
+    # Session data server e thake, cookie te shudhu session id (SESSION_BACKEND=mongo | memory | cookie).
+    session_interface = make_session_interface(os.getenv('SESSION_BACKEND', 'mongo'), db)
+    if session_interface:
+        app.session_interface = session_interface
+
   
     with app.app_context():
         app.register_blueprint(auth_bp)
@@ -41,6 +51,15 @@ def create_app():
         app.register_blueprint(community_bp)
         app.register_blueprint(host_bp)
         app.register_blueprint(admin_bp)
+
+    register_commands(app)
+
+    # Durable suggestion queue (SUGGESTION_QUEUE=mongo) e age theke thaka job gulo chalano hocche.
+    resume_suggestion_jobs()
+
+    # Sample data shudhu startup e seed hoy, request path e na (SEED_SAMPLE_DATA=1 hole).
+    if os.getenv('SEED_SAMPLE_DATA', '').lower() in ('1', 'true', 'yes'):
+        add_sample_spaces()
     
     @app.route('/')
     def index():
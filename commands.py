@@ -0,0 +1,126 @@
+# commands.py
+# Database maintenance er jonno Flask CLI command gulo ekhane register kora hoy.
+# Use: flask --app app <command-name>
+
+import click
+from models.review import rebuild_rating_summaries
+from models.booking import backfill_booking_dates, rebuild_occupied_stays
+from models.popularity import rebuild_popularity_scores
+from models.space import (
+    add_sample_spaces,
+    backfill_city_keys,
+    backfill_geo_locations,
+    normalize_photo_paths,
+    build_space_query,
+    spaces_collection,
+    sync_space_indexes,
+    DEFAULT_SORT_SPEC,
+    SORT_SPECS
+)
+from models.query_advisor import explain_cursor, query_shape
+from models.seed import generate_synthetic_data, clear_synthetic_data
+
+# Representative /spaces filter combinations checked by 'explain-searches'.
+SAMPLE_SEARCHES = [
+    {},
+    {'location': 'Dhaka'},
+    {'location': 'Dhaka', 'min_price': '1000', 'max_price': '3000'},
+    {'location': 'Dhaka', 'space_type': 'Private Room'},
+    {'location': 'Dhaka', 'coworking': 'true'},
+    {'min_price': '1000', 'max_price': '3000'},
+    {'space_type': 'Shared Room'},
+    {'amenities': ['High-Speed WiFi', 'AC']},
+    {'host_id': '000000000000000000000000'},
+    {'q': 'lake view'},
+    {'q': 'lake view', 'location': 'Dhaka', 'max_price': '3000'},
+    {'lat': '23.78', 'lng': '90.41', 'radius_km': '5'},
+    {'bbox': '90.3,23.7,90.5,23.9', 'max_price': '3000'},
+]
+
+
+def register_commands(app):
+    """App er shathe shob CLI command register kore."""
+
+    @app.cli.command('rebuild-ratings')
+    def rebuild_ratings_command():
+        """Recompute every space's rating_summary from the reviews collection."""
+        updated = rebuild_rating_summaries()
+        click.echo(f"Rebuilt rating summaries for {updated} spaces.")
+
+    @app.cli.command('backfill-city-keys')
+    def backfill_city_keys_command():
+        """Fill the normalized city_key field used by the city filter."""
+        updated = backfill_city_keys()
+        click.echo(f"Updated city_key on {updated} spaces.")
+
+    @app.cli.command('backfill-geo')
+    def backfill_geo_command():
+        """Fill the GeoJSON location field from latitude/longitude."""
+        updated = backfill_geo_locations()
+        click.echo(f"Updated location on {updated} spaces.")
+
+    @app.cli.command('normalize-photos')
+    def normalize_photos_command():
+        """Rewrite stored photo paths into the canonical 'uploads/<file>' form."""
+        updated = normalize_photo_paths()
+        click.echo(f"Normalized photo paths on {updated} spaces.")
+
+    @app.cli.command('backfill-booking-dates')
+    def backfill_booking_dates_command():
+        """Fill the native check_in/check_out dates used by the booking overlap check."""
+        updated = backfill_booking_dates()
+        click.echo(f"Updated check_in/check_out on {updated} bookings.")
+
+    @app.cli.command('rebuild-occupancy')
+    def rebuild_occupancy_command():
+        """Recompute every space's occupied stays (used by the date filter) from bookings."""
+        updated = rebuild_occupied_stays()
+        click.echo(f"Rebuilt occupied stays for {updated} spaces.")
+
+    @app.cli.command('rebuild-popularity')
+    def rebuild_popularity_command():
+        """Recompute every space's decayed popularity score from bookings, reviews and favorites."""
+        updated = rebuild_popularity_scores()
+        click.echo(f"Rebuilt popularity scores for {updated} spaces.")
+
+    @app.cli.command('sync-indexes')
+    @click.option('--drop', is_flag=True, help='Drop indexes that are not in the managed set.')
+    def sync_indexes_command(drop):
+        """Create the managed spaces indexes and report (or drop) unmanaged ones."""
+        unmanaged = sync_space_indexes(spaces_collection, drop=drop)
+        for name in unmanaged:
+            click.echo(f"{'Dropped' if drop else 'Unmanaged'} index: {name}")
+        click.echo("Spaces indexes are in sync.")
+
+    @app.cli.command('explain-searches')
+    def explain_searches_command():
+        """Print the winning plan for each representative filter_spaces query shape."""
+        for filters in SAMPLE_SEARCHES:
+            query = build_space_query(filters)
+            for sort_by, sort_spec in [('', DEFAULT_SORT_SPEC)] + list(SORT_SPECS.items()):
+                cursor = spaces_collection.find(query).sort(sort_spec).limit(25)
+                plan = explain_cursor(cursor)
+                flag = '  <-- COLLSCAN' if 'COLLSCAN' in plan else ''
+                click.echo(f"{query_shape(query)} sort={sort_by or 'default'}: {plan}{flag}")
+
+    @app.cli.command('seed-samples')
+    def seed_samples_command():
+        """Insert the 26 sample spaces and their hosts if the spaces collection is empty."""
+        add_sample_spaces()
+        click.echo("Sample data is in place.")
+
+    @app.cli.command('seed-synthetic')
+    @click.option('--hosts', default=10, show_default=True)
+    @click.option('--travelers', default=50, show_default=True)
+    @click.option('--spaces', default=200, show_default=True)
+    @click.option('--bookings', default=500, show_default=True)
+    @click.option('--reviews', default=500, show_default=True)
+    @click.option('--seed', type=int, default=None, help='Random seed for a reproducible data set.')
+    @click.option('--clear', is_flag=True, help='Delete previously generated synthetic data first.')
+    def seed_synthetic_command(hosts, travelers, spaces, bookings, reviews, seed, clear):
+        """Generate synthetic hosts, travelers, spaces, bookings and reviews."""
+        if clear:
+            deleted = clear_synthetic_data()
+            click.echo("Deleted: " + ", ".join(f"{n} {name}" for name, n in deleted.items()))
+        created = generate_synthetic_data(hosts, travelers, spaces, bookings, reviews, seed)
+        click.echo("Created: " + ", ".join(f"{n} {name}" for name, n in created.items()))
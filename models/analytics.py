@@ -23,40 +23,22 @@ def get_booking_overview():
     # Ei function ta ekhon ar beshi use hoy na, `get_advanced_analytics` e
     # aro efficient bhabe kaj kora hoyeche.
     total_bookings = db.bookings.count_documents({})
-    
-    total_revenue = 0
-    city_counts = {}
-    all_bookings = list(db.bookings.find({}))
 
-    for booking in all_bookings:
-        try:
-            # Safely handle both string and datetime objects
-            check_in_str = booking.get('check_in_date')
-            if isinstance(check_in_str, datetime):
-                check_in = check_in_str
-            else:
-                check_in = datetime.strptime(check_in_str, '%Y-%m-%d')
+    # Prottek booking e 'total_amount' save kora thake, tai revenue shudhu ekta $sum.
+    revenue = list(db.bookings.aggregate([{"$group": {"_id": None, "total_revenue": {"$sum": "$total_amount"}}}]))
+    total_revenue = revenue[0]["total_revenue"] if revenue else 0
 
-            check_out_str = booking.get('check_out_date')
-            if isinstance(check_out_str, datetime):
-                check_out = check_out_str
-            else:
-                check_out = datetime.strptime(check_out_str, '%Y-%m-%d')
-            
-            duration = (check_out - check_in).days
-            price = float(booking.get('price_per_night', 0))
-            total_revenue += duration * price
-            
-            space_id = booking.get('space_id')
-            if space_id:
-                space = db.spaces.find_one({'_id': ObjectId(space_id)})
-                if space:
-                    city = space.get('location_city')
-                    if city:
-                        city_counts[city] = city_counts.get(city, 0) + 1
-        except (ValueError, TypeError, KeyError) as e:
-            print(f"Skipping booking due to data error: {e}")
-            continue
+    # Space onujayi booking count, tarpor oi space gulor city ekta $in query te.
+    space_counts = {
+        doc["_id"]: doc["count"]
+        for doc in db.bookings.aggregate([{"$group": {"_id": "$space_id", "count": {"$sum": 1}}}])
+    }
+    space_ids = [ObjectId(space_id) for space_id in space_counts if ObjectId.is_valid(space_id)]
+    city_counts = {}
+    for space in db.spaces.find({"_id": {"$in": space_ids}}, {"location_city": 1}):
+        city = space.get('location_city')
+        if city:
+            city_counts[city] = city_counts.get(city, 0) + space_counts[str(space["_id"])]
             
     return {
         "total_bookings": total_bookings,
@@ -77,23 +59,14 @@ def get_advanced_analytics():
     new_users_this_month = db.users.count_documents({"created_at": {"$gte": start_of_month}})
 
     # --- Booking Statistics (using aggregation for efficiency) ---
+    # 'nights', 'total_amount' ar native 'check_in' booking er shomoy save hoy, tai kono date parse lage na.
     booking_stats_pipeline = [
         {"$match": {"status": "Confirmed"}},
-        {"$project": {
-            "check_in": {"$toDate": "$check_in_date"},
-            "check_out": {"$toDate": "$check_out_date"},
-            "booked_at": {"$toDate": "$booked_at"},
-            "price": {"$toDouble": "$price_per_night"},
-            "user_id": "$user_id",
-             "host_id": "$host_id"
-        }},
         {"$group": {
             "_id": None,
             "total_bookings": {"$sum": 1},
-            "total_revenue": {"$sum": {
-                "$multiply": ["$price", {"$max": [1, {"$dateDiff": {"startDate": "$check_in", "endDate": "$check_out", "unit": "day"}}]}]
-            }},
-            "total_duration": {"$sum": {"$dateDiff": {"startDate": "$check_in", "endDate": "$check_out", "unit": "day"}}},
+            "total_revenue": {"$sum": "$total_amount"},
+            "total_duration": {"$sum": "$nights"},
             "total_lead_time": {"$sum": {"$dateDiff": {"startDate": "$booked_at", "endDate": "$check_in", "unit": "day"}}},
             "unique_bookers": {"$addToSet": "$user_id"}
         }},
@@ -138,12 +111,7 @@ def get_advanced_analytics():
         {"$match": {"status": "Confirmed"}},
         {"$project": {
             "space_id_obj": {"$toObjectId": "$space_id"},
-            "revenue": {
-                "$multiply": [
-                    {"$toDouble": "$price_per_night"},
-                    {"$max": [1, {"$dateDiff": {"startDate": {"$toDate": "$check_in_date"}, "endDate": {"$toDate": "$check_out_date"}, "unit": "day"}}]}
-                ]
-            }
+            "revenue": "$total_amount"
         }},
         {"$lookup": {
             "from": "spaces",
@@ -169,20 +137,14 @@ def get_advanced_analytics():
     top_locations = list(db.spaces.aggregate(top_locations_pipeline))
 
     # --- Top Spaces by Average Rating ---
+    # Space document e rakha rating_summary theke, indexed sort diye.
     top_spaces_pipeline = [
-        {"$group": {"_id": "$space_id", "average_rating": {"$avg": "$rating"}}},
-        {"$sort": {"average_rating": -1}},
+        {"$match": {"rating_summary.count": {"$gt": 0}}},
+        {"$sort": {"rating_summary.average": -1, "_id": -1}},
         {"$limit": 5},
-        {"$lookup": {
-            "from": "spaces",
-            "localField": "_id",
-            "foreignField": "_id",
-            "as": "space_details"
-        }},
-        {"$unwind": "$space_details"},
-        {"$project": {"_id": "$space_details.space_title", "average_rating": 1}}
+        {"$project": {"_id": "$space_title", "average_rating": "$rating_summary.average"}}
     ]
-    top_spaces = list(db.reviews.aggregate(top_spaces_pipeline))
+    top_spaces = list(db.spaces.aggregate(top_spaces_pipeline))
     
     # --- Most Popular Amenities ---
     popular_amenities_pipeline = [
@@ -205,12 +167,7 @@ def get_advanced_analytics():
                     "else": None  # Set to null if it's not a 24-char string
                 }
             },
-            "booking_revenue": {
-                "$multiply": [
-                    {"$toDouble": "$price_per_night"},
-                    {"$max": [1, {"$dateDiff": {"startDate": {"$toDate": "$check_in_date"}, "endDate": {"$toDate": "$check_out_date"}, "unit": "day"}}]}
-                ]
-            }
+            "booking_revenue": "$total_amount"
         }},
         # Filter out documents where the host_id was invalid
         {"$match": {"host_id_obj": {"$ne": None}}},
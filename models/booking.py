@@ -0,0 +1,343 @@
+# models/booking.py
+# Booking toiri ebong cancel korar database kaaj. Ekta space e ek shomoy e ekjon i
+# booking likhte pare (per-space lock document diye), tai concurrent request ba
+# multiple worker thakleo same date e duibar booking hoy na.
+# Space document er 'occupied' list (confirmed, shesh na hoya stay gulo) o ekhane
+# update hoy; /spaces er date filter oi list diye free space khoje.
+
+import os
+import time
+import uuid
+from datetime import datetime, timedelta
+from pymongo import MongoClient, UpdateOne, ASCENDING
+from pymongo.errors import DuplicateKeyError
+from bson.objectid import ObjectId
+from .space import (
+    CACHE_PARTITION_FIELDS,
+    spaces_collection,
+    clear_space_cache,
+    invalidate_space_cache,
+    parse_stay_dates,
+    STAY_DATE_FORMAT
+)
+from .popularity import record_booking
+
+# create_booking er result.
+BOOKED = 'booked'
+DATES_UNAVAILABLE = 'dates_unavailable'
+INVALID_DATES = 'invalid_dates'
+SPACE_BUSY = 'space_busy'
+# Idempotency key ta onno space/date er submission e age use hoyeche.
+KEY_REUSED = 'key_reused'
+
+# Lock koto khon dhore rakha jay; worker crash korle ei shomoy por lock nije theke chhere dey.
+BOOKING_LOCK_LEASE = timedelta(seconds=float(os.getenv("BOOKING_LOCK_LEASE", "10")))
+# Onno request lock dhore rakhle koto khon wait kore SPACE_BUSY return kora hobe.
+BOOKING_LOCK_WAIT = float(os.getenv("BOOKING_LOCK_WAIT", "5"))
+BOOKING_LOCK_RETRY_INTERVAL = 0.05
+
+# Overlap query: space_id equality, tarpor check_in range; check_out o index e thake.
+# Host payout: host_id + status equality.
+BOOKING_INDEXES = [
+    [("space_id", ASCENDING), ("check_in", ASCENDING), ("check_out", ASCENDING)],
+    [("host_id", ASCENDING), ("status", ASCENDING)],
+]
+
+# Ek idempotency key diye abar POST ashle (double click, proxy retry) ager result ta
+# ferot deya hoy; key gulo ei koto second por TTL index diye nije theke muche jay.
+BOOKING_IDEMPOTENCY_TTL = int(os.getenv("BOOKING_IDEMPOTENCY_TTL", str(24 * 60 * 60)))
+
+
+def ensure_booking_indexes(collection):
+    """Bookings collection er managed index gulo toiri kore. Returns the index names."""
+    return [collection.create_index(keys) for keys in BOOKING_INDEXES]
+
+
+def ensure_idempotency_indexes(collection):
+    """Idempotency key collection er unique ebong TTL index toiri kore. Returns the index names."""
+    return [
+        collection.create_index([("user_id", ASCENDING), ("key", ASCENDING)], unique=True),
+        collection.create_index("created_at", expireAfterSeconds=BOOKING_IDEMPOTENCY_TTL),
+    ]
+
+
+try:
+    mongo_uri = os.getenv('MONGO_URI', 'mongodb://localhost:27017/nomadnest')
+    client = MongoClient(mongo_uri)
+    db = client.get_database('nomadnest')
+    bookings_collection = db.bookings
+    # Prottek space er jonno ekta document: {_id: space_id, locked_until, token}.
+    booking_locks_collection = db.booking_locks
+    # {user_id, key, fingerprint, created_at, status, booking_id}: prottek booking submission er result.
+    booking_idempotency_collection = db.booking_idempotency_keys
+    ensure_booking_indexes(bookings_collection)
+    ensure_idempotency_indexes(booking_idempotency_collection)
+    print("Booking Model: MongoDB connected successfully.")
+except Exception as e:
+    print(f"Booking Model: Error connecting to MongoDB: {e}")
+
+
+def overlap_query(space_id, check_in, check_out):
+    """Ei space er je confirmed booking gulo [check_in, check_out) er shathe overlap kore."""
+    return {
+        "space_id": str(space_id),
+        "check_in": {"$lt": check_out},
+        "check_out": {"$gt": check_in},
+        "status": "Confirmed",
+    }
+
+
+def _acquire_space_lock(space_id, token):
+    """
+    Space er lock document ta nite cheshta kore. Lock free (ba lease expired) hole
+    token bosiye True return kore; onno keu dhore rakhle upsert duplicate key dey, tai False.
+    """
+    now = datetime.utcnow()
+    try:
+        booking_locks_collection.update_one(
+            {"_id": space_id, "$or": [{"locked_until": {"$lte": now}}, {"locked_until": None}]},
+            {"$set": {"locked_until": now + BOOKING_LOCK_LEASE, "token": token}},
+            upsert=True
+        )
+        return True
+    except DuplicateKeyError:
+        return False
+
+
+def _release_space_lock(space_id, token):
+    # Shudhu nijer token thakle chhara hoy; lease expire hoye onno keu nile take chhoa hoy na.
+    booking_locks_collection.update_one(
+        {"_id": space_id, "token": token},
+        {"$set": {"locked_until": None, "token": None}}
+    )
+
+
+def booking_fingerprint(booking_record):
+    """Je booking er jonno key ta deya hoyeche: space ar date, jate onno submission e key replay na hoy."""
+    return [
+        str(booking_record.get("space_id")),
+        booking_record.get("check_in_date"),
+        booking_record.get("check_out_date"),
+    ]
+
+
+def _claim_idempotency_key(user_id, key, fingerprint):
+    """
+    (user_id, key) er jonno notun entry insert kore None return kore. Key ta age dekha
+    hole ager entry return kore; unique index thakay duita request eksathe claim korte pare na.
+    """
+    try:
+        booking_idempotency_collection.insert_one({
+            "user_id": user_id, "key": key, "fingerprint": fingerprint,
+            "created_at": datetime.utcnow(), "status": None
+        })
+        return None
+    except DuplicateKeyError:
+        return booking_idempotency_collection.find_one({"user_id": user_id, "key": key})
+
+
+def _replay_booking(user_id, key, claimed):
+    """
+    Ager submission er (status, booking) ferot dey. Prothom request ekhono cholle
+    BOOKING_LOCK_WAIT porjonto result er jonno wait kore, na pele SPACE_BUSY.
+    """
+    deadline = time.monotonic() + BOOKING_LOCK_WAIT
+    while claimed and not claimed.get("status") and time.monotonic() < deadline:
+        time.sleep(BOOKING_LOCK_RETRY_INTERVAL)
+        claimed = booking_idempotency_collection.find_one({"user_id": user_id, "key": key})
+    if not claimed or not claimed.get("status"):
+        return SPACE_BUSY, None
+    booking = None
+    if claimed.get("booking_id"):
+        booking = bookings_collection.find_one({"booking_id": claimed["booking_id"]})
+    return claimed["status"], booking
+
+
+def create_booking(booking_record, idempotency_key=None):
+    """
+    booking_record e 'check_in_date'/'check_out_date' string theke native 'check_in'/'check_out'
+    bosiye, overlap na thakle insert kore. Returns (status, booking_record); status holo
+    BOOKED, DATES_UNAVAILABLE, INVALID_DATES ba SPACE_BUSY.
+
+    Overlap check ar insert space er lock dhore kora hoy, tai duita request same date
+    eksathe check korleo shudhu prothom ta booking pay.
+
+    idempotency_key thakle same user er same key ar same space/date diye porer call notun
+    booking kore na, prothom call er result (ar booking) i return kore. Same key onno
+    space/date e ashle KEY_REUSED (kichu replay ba book kora hoy na). SPACE_BUSY (ba
+    error) hole key chhere deya hoy, jate retry abar cheshta korte pare.
+    """
+    if not idempotency_key:
+        return _create_booking(booking_record)
+
+    user_id = str(booking_record.get("user_id"))
+    fingerprint = booking_fingerprint(booking_record)
+    claimed = _claim_idempotency_key(user_id, idempotency_key, fingerprint)
+    if claimed:
+        if claimed.get("fingerprint") != fingerprint:
+            return KEY_REUSED, booking_record
+        return _replay_booking(user_id, idempotency_key, claimed)
+    status = SPACE_BUSY
+    try:
+        status, booking_record = _create_booking(booking_record)
+    finally:
+        if status == SPACE_BUSY:
+            booking_idempotency_collection.delete_one({"user_id": user_id, "key": idempotency_key})
+        else:
+            booking_idempotency_collection.update_one(
+                {"user_id": user_id, "key": idempotency_key},
+                {"$set": {"status": status, "booking_id": booking_record.get("booking_id") if status == BOOKED else None}}
+            )
+    return status, booking_record
+
+
+def booking_totals(check_in, check_out, price_per_night):
+    """
+    (nights, total_amount) hishab kore; same din er stay o ek raat hishebe gona hoy.
+    Payout ar analytics egulo booking e save kora value theke shudhu $sum kore.
+    """
+    nights = max(1, (check_out - check_in).days)
+    try:
+        price = float(price_per_night)
+    except (TypeError, ValueError):
+        price = 0
+    return nights, price * nights
+
+
+def _create_booking(booking_record):
+    dates = parse_stay_dates(booking_record.get("check_in_date"), booking_record.get("check_out_date"))
+    if not dates:
+        return INVALID_DATES, booking_record
+    booking_record["check_in"], booking_record["check_out"] = dates
+    booking_record["nights"], booking_record["total_amount"] = booking_totals(
+        *dates, booking_record.get("price_per_night")
+    )
+    space_id = str(booking_record["space_id"])
+
+    token = str(uuid.uuid4())
+    deadline = time.monotonic() + BOOKING_LOCK_WAIT
+    while not _acquire_space_lock(space_id, token):
+        if time.monotonic() >= deadline:
+            return SPACE_BUSY, booking_record
+        time.sleep(BOOKING_LOCK_RETRY_INTERVAL)
+    try:
+        if bookings_collection.find_one(overlap_query(space_id, *dates), {"_id": 1}):
+            return DATES_UNAVAILABLE, booking_record
+        bookings_collection.insert_one(booking_record)
+        _add_occupied_stay(space_id, booking_record)
+        record_booking(booking_record)
+        return BOOKED, booking_record
+    finally:
+        _release_space_lock(space_id, token)
+
+
+def _stay(booking):
+    """Space er 'occupied' list er ekta entry."""
+    return {"booking_id": booking["booking_id"], "check_in": booking["check_in"], "check_out": booking["check_out"]}
+
+
+def _space_filter(space_id):
+    try:
+        return {"_id": ObjectId(space_id)}
+    except Exception:
+        return None
+
+
+def _add_occupied_stay(space_id, booking):
+    """
+    Notun stay ta space er 'occupied' e jog kore ebong shesh hoye jawa stay gulo shoriye dey,
+    tarpor oi space er cached search gulo invalidate kore.
+    """
+    space_filter = _space_filter(space_id)
+    if not space_filter:
+        return
+    spaces_collection.update_one(space_filter, {"$push": {"occupied": _stay(booking)}})
+    space = spaces_collection.find_one_and_update(
+        space_filter,
+        {"$pull": {"occupied": {"check_out": {"$lte": datetime.utcnow()}}}},
+        projection=CACHE_PARTITION_FIELDS
+    )
+    invalidate_space_cache(space, listing_changed=False)
+
+
+def cancel_booking(booking_id, user_obj_id):
+    """
+    User er nijer ekta booking "Cancelled" kore. Booking paowa gele ebong
+    status bodlale True return kore.
+    """
+    # Shudhu ei user er booking e cancel korte parbe.
+    booking = bookings_collection.find_one_and_update(
+        {"booking_id": booking_id, "user_id": str(user_obj_id), "status": {"$ne": "Cancelled"}},
+        {"$set": {"status": "Cancelled"}},
+        projection={"space_id": 1, "booked_at": 1}
+    )
+    if not booking:
+        return False
+    record_booking(booking, cancelled=True)
+    # Date gulo abar free; space er 'occupied' theke stay ta shoriye deya hocche.
+    space_filter = _space_filter(booking.get("space_id"))
+    if space_filter:
+        space = spaces_collection.find_one_and_update(
+            space_filter,
+            {"$pull": {"occupied": {"booking_id": booking_id}}},
+            projection=CACHE_PARTITION_FIELDS
+        )
+        invalidate_space_cache(space, listing_changed=False)
+    return True
+
+
+def rebuild_occupied_stays():
+    """
+    Backfill/repair: shob space er 'occupied' list bookings collection theke notun kore banay
+    (shudhu confirmed ebong ekhono shesh na hoya stay). Returns the number of spaces written.
+    """
+    stays = {}
+    cursor = bookings_collection.find(
+        {"status": "Confirmed", "check_out": {"$gt": datetime.utcnow()}},
+        {"booking_id": 1, "space_id": 1, "check_in": 1, "check_out": 1}
+    )
+    for booking in cursor:
+        stays.setdefault(str(booking["space_id"]), []).append(_stay(booking))
+
+    operations = []
+    for space in spaces_collection.find({}, {"_id": 1}):
+        occupied = sorted(stays.get(str(space["_id"]), []), key=lambda stay: stay["check_in"])
+        operations.append(UpdateOne({"_id": space["_id"]}, {"$set": {"occupied": occupied}}))
+    if operations:
+        spaces_collection.bulk_write(operations, ordered=False)
+        clear_space_cache(listing_changed=False)
+    return len(operations)
+
+
+def _parse_date(value):
+    if isinstance(value, datetime):
+        return value
+    try:
+        return datetime.strptime(value, STAY_DATE_FORMAT)
+    except (TypeError, ValueError):
+        return None
+
+
+def backfill_booking_dates():
+    """
+    Migration: purono booking gulote 'check_in_date'/'check_out_date' string theke native
+    'check_in'/'check_out' ebong 'nights'/'total_amount' bosiye dey, jate overlap check,
+    payout ar analytics egulo o dekhte pay. Returns the number of bookings updated.
+    """
+    operations = []
+    missing = {"$or": [{"check_in": {"$exists": False}}, {"total_amount": {"$exists": False}}]}
+    fields = {"check_in_date": 1, "check_out_date": 1, "check_in": 1, "check_out": 1, "price_per_night": 1}
+    for booking in bookings_collection.find(missing, fields):
+        check_in = _parse_date(booking.get("check_in", booking.get("check_in_date")))
+        check_out = _parse_date(booking.get("check_out", booking.get("check_out_date")))
+        if not check_in or not check_out:
+            print(f"Could not backfill booking {booking.get('_id')}: unreadable dates")
+            continue
+        nights, total_amount = booking_totals(check_in, check_out, booking.get("price_per_night"))
+        operations.append(UpdateOne(
+            {"_id": booking["_id"]},
+            {"$set": {"check_in": check_in, "check_out": check_out, "nights": nights, "total_amount": total_amount}}
+        ))
+    if operations:
+        bookings_collection.bulk_write(operations, ordered=False)
+    return len(operations)
@@ -0,0 +1,138 @@
+# models/cache.py
+# In-process LRU + TTL cache. Prottek entry er shathe kichu "partition" tag thake
+# (jemon city, host), jate kono space change hole shudhu affected entry gulo muche fela jay.
+# Optional MongoVersionCounter diye onno worker der cache o invalidate kora jay.
+
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from pymongo import ReturnDocument
+
+
+class MongoVersionCounter:
+    """
+    Cross-worker invalidation channel: ekta counter document er version number.
+    Kono worker invalidate korle version bare; onno worker ra version bodlano dekhle
+    tader local cache clear kore.
+    """
+
+    def __init__(self, collection, name):
+        self.collection = collection
+        self.name = name
+
+    def current(self):
+        doc = self.collection.find_one({"_id": self.name})
+        return doc["value"] if doc else 0
+
+    def bump(self):
+        doc = self.collection.find_one_and_update(
+            {"_id": self.name},
+            {"$inc": {"value": 1}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        return doc["value"]
+
+
+class PartitionedCache:
+    """
+    Thread-safe LRU cache with a per-entry TTL and partition-based invalidation.
+    Values are deep-copied in and out so callers can mutate what they get back.
+    """
+
+    def __init__(self, max_entries=256, ttl_seconds=60, version_counter=None, sync_interval=1.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.version_counter = version_counter
+        self.sync_interval = sync_interval
+        self._entries = OrderedDict()  # key -> (expires_at, partitions, value)
+        self._lock = threading.Lock()
+        self._seen_version = None
+        self._last_sync = 0.0
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0, "invalidations": 0}
+
+    def get(self, key):
+        """Returns (True, value) on a hit and (False, None) on a miss."""
+        self._sync()
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats["misses"] += 1
+                return False, None
+            if entry[0] <= now:
+                del self._entries[key]
+                self._stats["expirations"] += 1
+                self._stats["misses"] += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            value = entry[2]
+        return True, copy.deepcopy(value)
+
+    def set(self, key, value, partitions=None):
+        entry = (time.monotonic() + self.ttl_seconds, partitions or {}, copy.deepcopy(value))
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def invalidate(self, predicate):
+        """
+        predicate(partitions) True return kora shob entry muche fele.
+        Version counter thakle onno worker der jonno version o barano hoy.
+        """
+        with self._lock:
+            stale = [key for key, entry in self._entries.items() if predicate(entry[1])]
+            for key in stale:
+                del self._entries[key]
+            self._stats["invalidations"] += len(stale)
+        self._publish()
+        return len(stale)
+
+    def clear(self):
+        with self._lock:
+            self._stats["invalidations"] += len(self._entries)
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats, size=len(self._entries), max_entries=self.max_entries,
+                         ttl_seconds=self.ttl_seconds)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / lookups, 3) if lookups else 0
+        return stats
+
+    def _sync(self):
+        """Onno worker version bariye thakle local cache clear kore (sync_interval e ekbar check)."""
+        if not self.version_counter:
+            return
+        now = time.monotonic()
+        if now - self._last_sync < self.sync_interval:
+            return
+        self._last_sync = now
+        try:
+            version = self.version_counter.current()
+        except Exception as e:
+            print(f"Cache: could not read version counter: {e}")
+            return
+        if self._seen_version is not None and version != self._seen_version:
+            self.clear()
+        self._seen_version = version
+
+    def _publish(self):
+        if not self.version_counter:
+            return
+        try:
+            version = self.version_counter.bump()
+        except Exception as e:
+            print(f"Cache: could not bump version counter: {e}")
+            return
+        # Amader bump er majhe onno keu bump kore thakle tader invalidation miss na korar jonno clear.
+        if self._seen_version is not None and version != self._seen_version + 1:
+            self.clear()
+        self._seen_version = version
@@ -1,29 +1,46 @@
 # models/favorites.py
 
+from datetime import datetime
+
 from bson.objectid import ObjectId
+from pymongo import ReturnDocument
 # We will use the 'db' and 'users_collection' from your existing user model
 # to ensure we are all using the same database connection.
 from models.user import db, users_collection
+from models.space import resolve_projection
+from models.popularity import record_favorite
 
 # We also need a reference to the spaces collection to fetch favorite details
 spaces_collection = db.spaces
 
 def add_favorite_to_user(user_obj_id, space_id):
-    """Adds a space's ID to a user's 'favorites' list in the users collection."""
+    """
+    Adds a space's ID to a user's 'favorites' list in the users collection.
+    The time it was added is kept in 'favorited_at' (keyed by space id) for popularity.
+    """
+    added_at = datetime.utcnow()
     # CORRECTED: Query by '_id'
-    users_collection.update_one(
-        {"_id": ObjectId(user_obj_id)},
-        # '$addToSet' ensures a space is not added more than once
-        {"$addToSet": {"favorites": ObjectId(space_id)}}
+    result = users_collection.update_one(
+        # Matching only users without this favorite ensures a space is not added more than once
+        {"_id": ObjectId(user_obj_id), "favorites": {"$ne": ObjectId(space_id)}},
+        {"$push": {"favorites": ObjectId(space_id)}, "$set": {f"favorited_at.{space_id}": added_at}}
     )
+    # Only a new favorite counts towards the space's popularity
+    if result.modified_count:
+        record_favorite(space_id, added=True, at=added_at)
 
 def remove_favorite_from_user(user_obj_id, space_id):
     """Removes a space's ID from a user's 'favorites' list."""
     # CORRECTED: Query by '_id'
-    users_collection.update_one(
-        {"_id": ObjectId(user_obj_id)},
-        {"$pull": {"favorites": ObjectId(space_id)}}
+    user = users_collection.find_one_and_update(
+        {"_id": ObjectId(user_obj_id), "favorites": ObjectId(space_id)},
+        {"$pull": {"favorites": ObjectId(space_id)}, "$unset": {f"favorited_at.{space_id}": ""}},
+        projection={f"favorited_at.{space_id}": 1},
+        return_document=ReturnDocument.BEFORE
     )
+    if user:
+        # Take back exactly what the favorite added, at the weight of the time it was added
+        record_favorite(space_id, added=False, at=(user.get("favorited_at") or {}).get(str(space_id)))
 
 def get_user_favorite_ids(user_obj_id):
     """Gets a list of just the IDs of a user's favorite spaces."""
@@ -34,12 +51,22 @@ def get_user_favorite_ids(user_obj_id):
         return [str(space_id) for space_id in user['favorites']]
     return []
 
-def get_user_favorite_spaces(user_obj_id):
-    """Gets the full document details for all of a user's favorite spaces."""
+def get_user_favorite_spaces(user_obj_id, projection=None):
+    """
+    Gets the documents for all of a user's favorite spaces.
+    projection: a profile name from models.space.PROJECTIONS (e.g. 'card') or a dict; None means full documents.
+    """
     # CORRECTED: Query by '_id'
-    user = users_collection.find_one({"_id": ObjectId(user_obj_id)})
+    user = users_collection.find_one({"_id": ObjectId(user_obj_id)}, {"favorites": 1})
     if user and 'favorites' in user:
-        favorite_ids = user['favorites']
-        # Find all spaces whose '_id' is in the user's list of favorite IDs
-        return list(spaces_collection.find({"_id": {"$in": favorite_ids}}))
+        return get_favorite_spaces_by_ids(user['favorites'], projection)
     return []
+
+def get_favorite_spaces_by_ids(favorite_ids, projection=None):
+    """
+    Gets the space documents for a 'favorites' list that was already read from the user document.
+    """
+    if not favorite_ids:
+        return []
+    # Find all spaces whose '_id' is in the user's list of favorite IDs
+    return list(spaces_collection.find({"_id": {"$in": favorite_ids}}, resolve_projection(projection)))
@@ -0,0 +1,196 @@
+# models/map_clusters.py
+# Map er jonno server-side marker clustering. Viewport (bbox) ke zoom onujayi ekta
+# grid e bhag kore prottek cell er space gulo ekta cluster e group kora hoy
+# (count, centroid, price range), tai catalog joto boro hok response er size
+# viewport er cell shonkhar upor nirbhor kore. Beshi zoom e individual point dey.
+
+import json
+import math
+import os
+
+from .space import (
+    db, spaces_collection, build_space_query, on_space_change, resolve_projection, _canonical_filters,
+    _parse_bbox, _env_flag, MAX_MAP_LATITUDE,
+)
+from .cache import PartitionedCache, MongoVersionCounter
+from . import query_advisor
+
+MIN_ZOOM = 0
+MAX_ZOOM = 22
+# Ei zoom ba tar beshi hole cluster na kore individual space point pathano hoy.
+POINTS_ZOOM = int(os.getenv("MAP_POINTS_ZOOM", "15"))
+# Ekta map tile (256px) er prostho ke koyta cell e bhag kora hobe (~64px per cell).
+CELLS_PER_TILE = 4
+# Response er size bound rakhar jonno shorbochcho cluster/point shonkha.
+MAX_CLUSTERS = 400
+MAX_POINTS = 500
+
+# Filter key gulo jegulo cluster query te mane; baki gulo cache key te dhoke na.
+CLUSTER_FILTER_KEYS = ('location', 'min_price', 'max_price', 'coworking', 'space_type', 'amenities')
+
+# Search cache er moto SPACE_CACHE_SYNC=1 hole onno worker der shathe 'counters'
+# collection er version document diye invalidation share hoy.
+cluster_cache = PartitionedCache(
+    max_entries=int(os.getenv("MAP_CACHE_SIZE", "512")),
+    ttl_seconds=float(os.getenv("MAP_CACHE_TTL", "300")),
+    version_counter=MongoVersionCounter(db.counters, "map_cluster_cache") if _env_flag("SPACE_CACHE_SYNC") else None
+)
+
+
+def cell_size(zoom):
+    """Ei zoom e grid cell er size (degree)."""
+    return 360.0 / (2 ** zoom * CELLS_PER_TILE)
+
+
+def snap_bbox(box, zoom):
+    """
+    Bbox ke cell grid er shathe outward snap kore, jate ektu pan korleo same
+    cache entry kaaje lage ebong cell gulo viewport er majhe kete na jay.
+    Latitude ±MAX_MAP_LATITUDE er baire jay na (pole e polygon invalid hoy).
+    """
+    size = cell_size(zoom)
+    min_lng, min_lat, max_lng, max_lat = box
+    return (
+        max(math.floor(min_lng / size) * size, -180.0),
+        max(math.floor(min_lat / size) * size, -MAX_MAP_LATITUDE),
+        min(math.ceil(max_lng / size) * size, 180.0),
+        min(math.ceil(max_lat / size) * size, MAX_MAP_LATITUDE),
+    )
+
+
+def _cluster_filters(filters):
+    """Search er canonical filter form, shudhu CLUSTER_FILTER_KEYS niye."""
+    return _canonical_filters({key: filters.get(key) for key in CLUSTER_FILTER_KEYS})
+
+
+def _cluster_query(filters, box):
+    # Choura (>= 180 degree) bbox build_space_query nijei coordinate range diye filter kore.
+    return build_space_query(dict(_cluster_filters(filters), bbox=','.join(str(v) for v in box)))
+
+
+def _cluster_pipeline(query, zoom):
+    size = cell_size(zoom)
+    return [
+        {'$match': query},
+        {'$project': {
+            'price_per_night': 1,
+            'lng': {'$arrayElemAt': ['$location.coordinates', 0]},
+            'lat': {'$arrayElemAt': ['$location.coordinates', 1]},
+        }},
+        {'$group': {
+            '_id': {
+                'x': {'$floor': {'$divide': ['$lng', size]}},
+                'y': {'$floor': {'$divide': ['$lat', size]}},
+            },
+            'count': {'$sum': 1},
+            'lat': {'$avg': '$lat'},
+            'lng': {'$avg': '$lng'},
+            'min_price': {'$min': '$price_per_night'},
+            'max_price': {'$max': '$price_per_night'},
+            'space_id': {'$first': '$_id'},
+        }},
+        {'$sort': {'count': -1}},
+        {'$limit': MAX_CLUSTERS},
+    ]
+
+
+def _load_clusters(query, zoom):
+    pipeline = _cluster_pipeline(query, zoom)
+    query_advisor.record_pipeline('map_clusters', spaces_collection, pipeline, query)
+    clusters = []
+    for group in spaces_collection.aggregate(pipeline):
+        cluster = {
+            'count': group['count'],
+            'lat': round(group['lat'], 6),
+            'lng': round(group['lng'], 6),
+            'min_price': group.get('min_price'),
+            'max_price': group.get('max_price'),
+        }
+        # Ekta matro space hole client shorashori tar marker dekhate pare.
+        if group['count'] == 1:
+            cluster['space_id'] = str(group['space_id'])
+        clusters.append(cluster)
+    return clusters
+
+
+def _load_points(query):
+    cursor = spaces_collection.find(query, resolve_projection('map_point')).limit(MAX_POINTS + 1)
+    query_advisor.record('map_points', cursor, query)
+    points = []
+    for space in cursor:
+        lng, lat = space['location']['coordinates']
+        points.append({
+            'space_id': str(space['_id']),
+            'space_title': space.get('space_title'),
+            'space_type': space.get('space_type'),
+            'price_per_night': space.get('price_per_night'),
+            'lat': lat,
+            'lng': lng,
+        })
+    return points
+
+
+def get_map_clusters(filters, bbox, zoom):
+    """
+    Viewport er jonno cluster (ba POINTS_ZOOM theke individual point) return kore.
+    bbox holo 'minLng,minLat,maxLng,maxLat'; invalid hole None return kore.
+
+    Returns {'zoom', 'bbox' (snapped), 'mode': 'clusters'|'points',
+    'clusters' or 'points', 'truncated'}. Result zoom + snapped bbox + filter
+    onujayi cache hoy ebong oi area te kono space bodlale invalidate hoy.
+    """
+    box = _parse_bbox(bbox)
+    if not box:
+        return None
+    try:
+        zoom = min(max(int(zoom), MIN_ZOOM), MAX_ZOOM)
+    except (ValueError, TypeError):
+        return None
+    box = snap_bbox(box, zoom)
+
+    key = json.dumps([zoom, box, _cluster_filters(filters)], sort_keys=True)
+    hit, result = cluster_cache.get(key)
+    if hit:
+        return result
+
+    query = _cluster_query(filters, box)
+    result = {'zoom': zoom, 'bbox': list(box)}
+    if zoom >= POINTS_ZOOM:
+        points = _load_points(query)
+        result.update(mode='points', points=points[:MAX_POINTS], truncated=len(points) > MAX_POINTS)
+    else:
+        clusters = _load_clusters(query, zoom)
+        result.update(mode='clusters', clusters=clusters, truncated=len(clusters) >= MAX_CLUSTERS)
+
+    cluster_cache.set(key, result, {'zoom': zoom, 'bbox': box})
+    return result
+
+
+def _point_of(space):
+    coordinates = (space.get('location') or {}).get('coordinates')
+    return tuple(coordinates) if coordinates and len(coordinates) == 2 else None
+
+
+@on_space_change
+def invalidate_map_clusters(spaces):
+    """
+    Listing (create/update/delete) bodlale oi space er point je cached viewport er moddhe
+    pore shudhu shegulo muche fele. Location chara space map e ashe na, tai egulo bad.
+    spaces None (bulk change) hole puro cache clear. Booking ba review (occupied, rating)
+    cluster e dekhano hoy na, tai oigulo te ei listener call hoy na.
+    """
+    if spaces is None:
+        cluster_cache.invalidate(lambda partitions: True)
+        return
+    points = [point for point in map(_point_of, spaces) if point]
+    if not points:
+        return
+
+    def affected(partitions):
+        min_lng, min_lat, max_lng, max_lat = partitions['bbox']
+        return any(min_lng <= lng <= max_lng and min_lat <= lat <= max_lat for lng, lat in points)
+    cluster_cache.invalidate(affected)
+
+
+def get_cluster_cache_stats():
+    return cluster_cache.stats()
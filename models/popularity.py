@@ -0,0 +1,114 @@
+# models/popularity.py
+# Space er materialized popularity score: booking, favorite ar review theke, shomoy er
+# shathe decay hoy. "Forward decay" use kora hoy: prottek event er weight ke
+# 2 ^ ((event time - EPOCH) / half life) diye gun kore 'popularity_score' e jog kora hoy.
+# Tai notun event beshi weight pay, ar purono score gulo abar likhte hoy na; shob
+# space er score ek i factor e decay hoy bole order shob shomoy thik thake.
+
+import os
+from datetime import datetime
+
+from bson.objectid import ObjectId
+from pymongo import UpdateOne
+
+from .user import db, users_collection
+from .space import spaces_collection
+
+POPULARITY_EPOCH = datetime(2025, 1, 1)
+# Koto din por ekta event er weight ordhek hoye jay.
+POPULARITY_HALF_LIFE_DAYS = float(os.getenv("POPULARITY_HALF_LIFE_DAYS", "30"))
+
+BOOKING_WEIGHT = 3.0
+FAVORITE_WEIGHT = 1.0
+# 5 star +REVIEW_WEIGHT, 3 star 0, 1 star -REVIEW_WEIGHT.
+REVIEW_WEIGHT = 2.0
+
+
+def decay_factor(at=None):
+    """'at' shomoyer event er multiplier (EPOCH theke half life er hishabe 2 er power)."""
+    days = ((at or datetime.utcnow()) - POPULARITY_EPOCH).total_seconds() / 86400
+    return 2 ** (days / POPULARITY_HALF_LIFE_DAYS)
+
+
+def current_popularity(score, now=None):
+    """Stored 'popularity_score' ke ajker hishebe (event weight er unit e) convert kore."""
+    return (score or 0) / decay_factor(now)
+
+
+def record_popularity(space_id, weight, at=None):
+    """
+    Space er score e ekta event jog kore (weight negative hote pare, jemon unfavorite,
+    cancel). Score 0 er niche name na.
+    """
+    try:
+        space_obj_id = ObjectId(space_id)
+    except Exception:
+        return
+    delta = weight * decay_factor(at)
+    spaces_collection.update_one(
+        {"_id": space_obj_id},
+        [{"$set": {"popularity_score": {"$max": [0, {"$add": [{"$ifNull": ["$popularity_score", 0]}, delta]}]}}}]
+    )
+
+
+def record_booking(booking, cancelled=False):
+    """Booking hole score bare; cancel hole oi booking er contribution (booked_at er weight) ferot jay."""
+    weight = -BOOKING_WEIGHT if cancelled else BOOKING_WEIGHT
+    record_popularity(booking.get("space_id"), weight, booking.get("booked_at"))
+
+
+def record_favorite(space_id, added=True, at=None):
+    """
+    Favorite add hole score bare; remove hole oi favorite er contribution ferot jay, tai
+    'at' hobe favorite add korar shomoy (user er 'favorited_at'), remove er shomoy na.
+    """
+    record_popularity(space_id, FAVORITE_WEIGHT if added else -FAVORITE_WEIGHT, at)
+
+
+def review_weight(rating):
+    return REVIEW_WEIGHT * (int(rating) - 3) / 2
+
+
+def record_review(space_id, rating, at=None):
+    record_popularity(space_id, review_weight(rating), at)
+
+
+def rebuild_popularity_scores():
+    """
+    Backfill/repair: shob space er 'popularity_score' bookings, reviews ar users er
+    favorites theke notun kore hishab kore. Favorite er 'favorited_at' na thakle (purono
+    data) ajker weight pay ebong oi shomoy ta 'favorited_at' e likha hoy, jate porer
+    remove same weight ferot ney. Returns the number of spaces written.
+    """
+    now = datetime.utcnow()
+    scores = {}
+
+    def add(space_id, weight, at=None):
+        key = str(space_id)
+        scores[key] = scores.get(key, 0) + weight * decay_factor(at)
+
+    for booking in db.bookings.find({"status": "Confirmed"}, {"space_id": 1, "booked_at": 1}):
+        add(booking.get("space_id"), BOOKING_WEIGHT, booking.get("booked_at"))
+    for review in db.reviews.find({}, {"space_id": 1, "rating": 1, "created_at": 1}):
+        add(review.get("space_id"), review_weight(review.get("rating", 3)), review.get("created_at"))
+    user_operations = []
+    for user in users_collection.find({"favorites.0": {"$exists": True}}, {"favorites": 1, "favorited_at": 1}):
+        favorited_at = user.get("favorited_at") or {}
+        missing = {}
+        for space_id in user["favorites"]:
+            added_at = favorited_at.get(str(space_id))
+            if not added_at:
+                added_at = missing[f"favorited_at.{space_id}"] = now
+            add(space_id, FAVORITE_WEIGHT, added_at)
+        if missing:
+            user_operations.append(UpdateOne({"_id": user["_id"]}, {"$set": missing}))
+    if user_operations:
+        users_collection.bulk_write(user_operations, ordered=False)
+
+    operations = [
+        UpdateOne({"_id": space["_id"]}, {"$set": {"popularity_score": max(0, scores.get(str(space["_id"]), 0))}})
+        for space in spaces_collection.find({}, {"_id": 1})
+    ]
+    if operations:
+        spaces_collection.bulk_write(operations, ordered=False)
+    return len(operations)
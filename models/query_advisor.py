@@ -0,0 +1,130 @@
+# models/query_advisor.py
+# Query shape advisor: prottek notun query shape er jonno ekbar explain() chalay ebong
+# winning plan log kore, jate bujha jay kon search gulo ekhono collection scan kore.
+# QUERY_ADVISOR=1 environment variable set thakle active hoy; na thakle kichui kore na.
+
+import logging
+import os
+import re
+import threading
+
+logger = logging.getLogger(__name__)
+
+ENABLED = os.getenv("QUERY_ADVISOR", "").lower() in ("1", "true", "yes")
+
+# (name, shape, sort) -> {"count": int, "plan": str}
+_shapes = {}
+_lock = threading.Lock()
+
+
+def query_shape(value):
+    """
+    Query theke actual value gulo shoriye shudhu structure rakhe, jemon
+    {'city_key': re.compile('^dha'), 'price_per_night': {'$lte': 2000}}
+    -> {'city_key': 'regex', 'price_per_night': {'$lte': 'int'}}.
+    """
+    if isinstance(value, dict):
+        return {key: query_shape(value[key]) for key in sorted(value)}
+    if isinstance(value, (list, tuple)):
+        shapes = []
+        for item in value:
+            shape = query_shape(item)
+            if shape not in shapes:
+                shapes.append(shape)
+        return shapes
+    if isinstance(value, re.Pattern):
+        return "regex"
+    return type(value).__name__
+
+
+def summarize_plan(explain_output):
+    """
+    explain() output theke winning plan er stage chain ber kore,
+    jemon "LIMIT > FETCH > IXSCAN(city_key_1_price_per_night_1__id_1)".
+    """
+    # Aggregation explain er output e find() er plan ta prothom '$cursor' stage e thake.
+    if "stages" in explain_output and "queryPlanner" not in explain_output:
+        explain_output = explain_output["stages"][0].get("$cursor", {})
+    planner = explain_output.get("queryPlanner", {})
+    plan = planner.get("winningPlan", {})
+    # Slot-based engine er output e asol plan 'queryPlan' er niche thake.
+    plan = plan.get("queryPlan", plan)
+
+    stages = []
+    while plan:
+        stage = plan.get("stage", "?")
+        if plan.get("indexName"):
+            stage = f"{stage}({plan['indexName']})"
+        stages.append(stage)
+        children = plan.get("inputStages") or ([plan["inputStage"]] if "inputStage" in plan else [])
+        if len(children) > 1:
+            stages.append("[" + " | ".join(summarize_plan({"queryPlanner": {"winningPlan": c}}) for c in children) + "]")
+            break
+        plan = children[0] if children else None
+    return " > ".join(stages)
+
+
+def explain_cursor(cursor):
+    """Cursor er ekta copy te explain() chaliye plan summary return kore."""
+    try:
+        return summarize_plan(cursor.clone().explain())
+    except Exception as e:
+        return f"explain failed: {e}"
+
+
+def explain_pipeline(collection, pipeline):
+    """Aggregation pipeline er jonno explain command chaliye plan summary return kore."""
+    try:
+        output = collection.database.command(
+            "explain",
+            {"aggregate": collection.name, "pipeline": pipeline, "cursor": {}},
+            verbosity="queryPlanner"
+        )
+        return summarize_plan(output)
+    except Exception as e:
+        return f"explain failed: {e}"
+
+
+def record(name, cursor, query, sort=None):
+    """
+    Query shape ta record kore. Notun shape hole explain() kore winning plan log kore;
+    COLLSCAN hole warning hishebe log hoy. Cursor ta consume kora hoy na.
+    """
+    if ENABLED:
+        _record(name, query, sort, lambda: explain_cursor(cursor))
+
+
+def record_pipeline(name, collection, pipeline, query, sort=None):
+    """record() er aggregation version; 'query' holo pipeline er prothom $match."""
+    if ENABLED:
+        _record(name, query, sort, lambda: explain_pipeline(collection, pipeline))
+
+
+def _record(name, query, sort, explain):
+    key = (name, repr(query_shape(query)), tuple(sort or ()))
+    with _lock:
+        entry = _shapes.get(key)
+        if entry:
+            entry["count"] += 1
+            return
+        entry = _shapes[key] = {"count": 1, "plan": None}
+
+    entry["plan"] = explain()
+    level = logging.WARNING if "COLLSCAN" in entry["plan"] else logging.INFO
+    logger.log(level, "query shape %s %s sort=%s -> %s", name, key[1], list(key[2]), entry["plan"])
+
+
+def get_report():
+    """Ekhon porjonto dekha shob query shape, kotobar cholse ebong tar winning plan."""
+    with _lock:
+        rows = [
+            {"name": name, "shape": shape, "sort": list(sort), "count": entry["count"], "plan": entry["plan"]}
+            for (name, shape, sort), entry in _shapes.items()
+        ]
+    return sorted(rows, key=lambda row: row["count"], reverse=True)
+
+
+def reset():
+    """Record kora shob shape muche fele."""
+    with _lock:
+        _shapes.clear()
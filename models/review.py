@@ -2,9 +2,38 @@
 # Ei file ta user review shomporkito shob database kaaj handle kore.
 
 import os
-from pymongo import MongoClient
+from pymongo import MongoClient, UpdateOne, ReturnDocument, ASCENDING, DESCENDING
 from datetime import datetime
 from bson.objectid import ObjectId
+from .space import (
+    RATING_STARS,
+    CACHE_PARTITION_FIELDS,
+    clear_space_cache,
+    empty_rating_summary,
+    invalidate_space_cache,
+    resolve_projection,
+    encode_cursor,
+    decode_cursor,
+    _keyset_clause,
+    _sort_key_values
+)
+from .popularity import record_review
+
+# Review list gulo notun theke purono; same created_at hole '_id' diye order stable.
+REVIEW_SORT_SPEC = [("created_at", DESCENDING), ("_id", DESCENDING)]
+REVIEW_PAGE_SIZE = 10
+
+# Space detail page ebong traveler profile er review pagination (equality field, tarpor sort key).
+REVIEW_INDEXES = [
+    [("space_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+    [("user_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+]
+
+
+def ensure_review_indexes(collection):
+    """Review collection er managed index gulo toiri kore. Returns the index names."""
+    return [collection.create_index(keys) for keys in REVIEW_INDEXES]
+
 
 try:
     # MongoDB connection string environment variable theke neyar cheshta kora hocche.
@@ -15,6 +44,7 @@ try:
     # 'reviews' and 'spaces' collection er reference toiri kora hocche.
     reviews_collection = db.reviews
     spaces_collection = db.spaces # Space collection er reference
+    ensure_review_indexes(reviews_collection)
     print("Review Model: MongoDB connected successfully.")
 except Exception as e:
     print(f"Review Model: Error connecting to MongoDB: {e}")
@@ -33,40 +63,176 @@ def create_review(space_id, user_obj_id, user_name, rating, comment, photo_url=N
         "created_at": datetime.utcnow() # review toirir shomoy save kora hocche
     }
     # reviews_collection e document ta insert kora hocche.
-    return reviews_collection.insert_one(review_document)
+    result = reviews_collection.insert_one(review_document)
+    # Space document er rating summary ar popularity score update kora hocche.
+    _apply_rating_to_space(review_document["space_id"], review_document["rating"])
+    record_review(review_document["space_id"], review_document["rating"], review_document["created_at"])
+    return result
 
-def get_reviews_for_space(space_id):
-    """Ekta nirdishto space er shob review database theke fetch kore."""
-    # space_id diye shob matching review khuje ber kora hocche.
-    # created_at onujayi notun theke purono (descending) shajano hocche.
-    return list(reviews_collection.find({"space_id": ObjectId(space_id)}).sort("created_at", -1))
+def _apply_rating_to_space(space_obj_id, rating):
+    """
+    Space er 'rating_summary' te notun rating ta $inc diye jog kore, tarpor average set kore.
+    Average set kora hoy shudhu jodi count ekhono amader $inc er porer value thake;
+    concurrent review thakle shesh writer shothik average likhbe.
+    Backfill er age purono space e 'rating_summary' na thakle $inc kora hoy na (tahole
+    shudhu ei review ta count hoto); reviews theke puro summary hishab kore set kora hoy.
+    """
+    updated = spaces_collection.find_one_and_update(
+        {"_id": space_obj_id, "rating_summary": {"$exists": True}},
+        {"$inc": {
+            "rating_summary.count": 1,
+            "rating_summary.sum": rating,
+            f"rating_summary.histogram.{rating}": 1
+        }},
+        projection=dict(CACHE_PARTITION_FIELDS, **{"rating_summary.count": 1, "rating_summary.sum": 1}),
+        return_document=ReturnDocument.AFTER
+    )
+    if not updated:
+        # Notun review ta already insert hoyeche, tai summary te o thakbe.
+        summary = _rating_summaries_from_reviews({"space_id": space_obj_id}).get(space_obj_id, empty_rating_summary())
+        updated = spaces_collection.find_one_and_update(
+            {"_id": space_obj_id, "rating_summary": {"$exists": False}},
+            {"$set": {"rating_summary": summary}},
+            projection=CACHE_PARTITION_FIELDS
+        )
+        invalidate_space_cache(updated, listing_changed=False)
+        return
+    summary = updated["rating_summary"]
+    spaces_collection.update_one(
+        {"_id": space_obj_id, "rating_summary.count": summary["count"]},
+        {"$set": {"rating_summary.average": summary["sum"] / summary["count"]}}
+    )
+    # Cached listing e purono rating na thake.
+    invalidate_space_cache(updated, listing_changed=False)
+
+def build_review_page(items, page_size, cursor_name):
+    """
+    (page_size + 1) ta fetch kora review theke {'reviews', 'next_cursor'} banay.
+    cursor_name diye cursor ta kon list er sheta bojha jay (onno list e chalano jay na).
+    """
+    reviews = items[:page_size]
+    next_cursor = None
+    if len(items) > page_size and reviews:
+        next_cursor = encode_cursor(cursor_name, _sort_key_values(reviews[-1], REVIEW_SORT_SPEC), 'after')
+    return {"reviews": reviews, "next_cursor": next_cursor}
+
+def get_space_reviews_page(space_id, cursor=None, page_size=REVIEW_PAGE_SIZE):
+    """
+    Ekta space er review er ekta page, notun theke purono, (space_id, created_at) index diye.
+    Returns {'reviews', 'next_cursor'}.
+    """
+    query = {"space_id": ObjectId(space_id)}
+    position = decode_cursor(cursor, f"reviews:{space_id}", REVIEW_SORT_SPEC)
+    if position and position[0] == 'after':
+        query = {"$and": [query, _keyset_clause(REVIEW_SORT_SPEC, position[1])]}
+    items = list(reviews_collection.find(query).sort(REVIEW_SORT_SPEC).limit(page_size + 1))
+    return build_review_page(items, page_size, f"reviews:{space_id}")
 
 # --- NEW: Ekjon nirdishto user er shob review paowar jonno function ---
-def get_reviews_by_user(user_obj_id):
+def get_reviews_by_user(user_obj_id, cursor=None, page_size=REVIEW_PAGE_SIZE):
     """
-    Ekjon nirdishto user er deya shob review database theke fetch kore.
+    Ekjon nirdishto user er deya review er ekta page, notun theke purono, (user_id, created_at) index diye.
+    Prottek review e 'space_details' (card field gulo) thake. Returns {'reviews', 'next_cursor'}.
+    Review joto i thakuk, query hoy duita: ekta review page er, ekta oi page er space gulor.
     """
     # CORRECTED: Query by 'user_id' which now stores the ObjectId
-    user_reviews = list(reviews_collection.find({"user_id": ObjectId(user_obj_id)}).sort("created_at", -1))
-    
-    # Prottekta review er jonno, oi review ta kon space er, shetar details fetch kora hocche.
-    for review in user_reviews:
-        space_details = spaces_collection.find_one({"_id": review['space_id']})
+    query = {"user_id": ObjectId(user_obj_id)}
+    position = decode_cursor(cursor, f"user_reviews:{user_obj_id}", REVIEW_SORT_SPEC)
+    if position and position[0] == 'after':
+        query = {"$and": [query, _keyset_clause(REVIEW_SORT_SPEC, position[1])]}
+    items = list(reviews_collection.find(query).sort(REVIEW_SORT_SPEC).limit(page_size + 1))
+    page = build_review_page(items, page_size, f"user_reviews:{user_obj_id}")
+
+    # Page er shob review er space ekta $in query te ana hocche.
+    space_ids = list({review['space_id'] for review in page["reviews"]})
+    spaces = {
+        space["_id"]: space
+        for space in spaces_collection.find({"_id": {"$in": space_ids}}, resolve_projection('card'))
+    } if space_ids else {}
+    for review in page["reviews"]:
         # review document er moddhe space er details add kora hocche.
-        review['space_details'] = space_details
-    return user_reviews
-
-def get_average_rating_for_space(space_id):
-    """Ekta nirdishto space er shob review er rating er average hishab kore."""
-    # space er shob review fetch kora hocche.
-    reviews = get_reviews_for_space(space_id)
-    # Jodi kono review na thake, tahole 0 return kora hocche.
-    if not reviews:
+        review['space_details'] = spaces.get(review['space_id'])
+    return page
+
+def get_rating_summaries(space_ids):
+    """
+    Ekadhik space er average rating ebong review count ekta aggregation e hishab kore.
+    Returns {space_id: (average_rating, review_count)}; spaces without reviews are omitted.
+    """
+    ids = [ObjectId(space_id) for space_id in space_ids]
+    if not ids:
+        return {}
+    pipeline = [
+        {"$match": {"space_id": {"$in": ids}}},
+        {"$group": {
+            "_id": "$space_id",
+            "average_rating": {"$avg": "$rating"},
+            "review_count": {"$sum": 1}
+        }}
+    ]
+    return {
+        doc["_id"]: (round(doc["average_rating"], 1), doc["review_count"])
+        for doc in reviews_collection.aggregate(pipeline)
+    }
+
+def rating_from_summary(summary):
+    """Space document er 'rating_summary' theke (average_rating, review_count) return kore."""
+    if not summary or not summary.get("count"):
         return 0, 0
-    
-    # Shob rating jog kora hocche.
-    total_rating = sum(r['rating'] for r in reviews)
-    # Average hishab kora hocche and ek doshomik sthan porjonto rakha hocche.
-    average_rating = round(total_rating / len(reviews), 1)
-    # Gor rating ebong total review shongkhya return kora hocche.
-    return average_rating, len(reviews)
+    return round(summary.get("average", 0), 1), summary["count"]
+
+def get_space_rating(space):
+    """
+    Ekta space document er (average_rating, review_count). Denormalized summary thakle
+    kono query lage na; backfill er age purono document er jonno reviews theke hishab kore.
+    """
+    if "rating_summary" in space:
+        return rating_from_summary(space["rating_summary"])
+    return get_rating_summaries([space["_id"]]).get(ObjectId(space["_id"]), (0, 0))
+
+def attach_ratings(spaces):
+    """
+    Page er prottekta space e 'average_rating' ebong 'review_count' bosiye dey.
+    Shudhu jeshob space e 'rating_summary' nei, shegular jonno ekta batched query hoy.
+    """
+    missing = [space['_id'] for space in spaces if 'rating_summary' not in space]
+    summaries = get_rating_summaries(missing)
+    for space in spaces:
+        if 'rating_summary' in space:
+            space['average_rating'], space['review_count'] = rating_from_summary(space['rating_summary'])
+        else:
+            space['average_rating'], space['review_count'] = summaries.get(ObjectId(space['_id']), (0, 0))
+    return spaces
+
+def _rating_summaries_from_reviews(match=None):
+    """'match' er review gulo theke space_id -> rating_summary (average shoho) hishab kore."""
+    summaries = {}
+    pipeline = [{"$group": {"_id": {"space_id": "$space_id", "rating": "$rating"}, "n": {"$sum": 1}}}]
+    if match:
+        pipeline.insert(0, {"$match": match})
+    for doc in reviews_collection.aggregate(pipeline):
+        space_id, rating = doc["_id"]["space_id"], doc["_id"]["rating"]
+        summary = summaries.setdefault(space_id, empty_rating_summary())
+        summary["count"] += doc["n"]
+        summary["sum"] += rating * doc["n"]
+        if rating in RATING_STARS:
+            summary["histogram"][str(rating)] += doc["n"]
+    for summary in summaries.values():
+        summary["average"] = summary["sum"] / summary["count"]
+    return summaries
+
+def rebuild_rating_summaries():
+    """
+    Backfill/repair: shob space er 'rating_summary' reviews collection theke notun kore hishab kore.
+    Returns the number of space documents written.
+    """
+    summaries = _rating_summaries_from_reviews()
+
+    operations = []
+    for space in spaces_collection.find({}, {"_id": 1}):
+        summary = summaries.get(space["_id"], empty_rating_summary())
+        operations.append(UpdateOne({"_id": space["_id"]}, {"$set": {"rating_summary": summary}}))
+    if operations:
+        spaces_collection.bulk_write(operations, ordered=False)
+        clear_space_cache(listing_changed=False)
+    return len(operations)
@@ -0,0 +1,201 @@
+# models/seed.py
+# Load testing ebong local development er jonno synthetic data generator.
+# Host, traveler, space, booking ebong review toiri kore; shob document e
+# "synthetic": True thake jate pore shudhu oi data muche fela jay.
+
+import random
+import uuid
+from datetime import datetime, timedelta
+
+from werkzeug.security import generate_password_hash
+
+from .user import db, users_collection
+from .space import spaces_collection, normalize_city, geo_point, empty_rating_summary, clear_space_cache, _picsum
+from .review import reviews_collection, rebuild_rating_summaries
+from .booking import rebuild_occupied_stays, booking_totals
+from .popularity import rebuild_popularity_scores
+
+bookings_collection = db.bookings
+
+# Batch e insert kora hoy jate boro N e memory ar round trip kom lage.
+BATCH_SIZE = 1000
+
+# City -> (latitude, longitude) center; space gulo er ashe pashe chhoriye deya hoy.
+CITY_CENTERS = {
+    "Dhaka": (23.7806, 90.4070),
+    "Chittagong": (22.3569, 91.7832),
+    "Cox's Bazar": (21.4272, 92.0058),
+    "Sylhet": (24.8949, 91.8687),
+    "Sreemangal": (24.3069, 91.7292),
+    "Khulna": (22.8456, 89.5403),
+    "Rajshahi": (24.3745, 88.6042),
+    "Barisal": (22.7010, 90.3535),
+    "Rangpur": (25.7439, 89.2752),
+    "Mymensingh": (24.7471, 90.4203),
+    "Gazipur": (24.0958, 90.4125),
+    "Bandarban": (22.1953, 92.2184),
+}
+SPACE_TYPES = ["Full Apartment", "Private Room", "Shared Room"]
+AMENITIES = ["High-Speed WiFi", "AC", "Kitchen", "Parking", "Pool"]
+TITLE_WORDS = ["Cozy", "Modern", "Quiet", "Lake View", "Hillside", "Riverside", "Garden", "City Center", "Tea Garden", "Sunny"]
+COMMENTS = ["Great stay!", "Fast WiFi and a quiet room.", "Good value for money.", "Host was very helpful.", "Could be cleaner."]
+
+
+def _insert_in_batches(collection, documents):
+    batch = []
+    inserted = []
+    for doc in documents:
+        batch.append(doc)
+        if len(batch) >= BATCH_SIZE:
+            inserted.extend(collection.insert_many(batch, ordered=False).inserted_ids)
+            batch = []
+    if batch:
+        inserted.extend(collection.insert_many(batch, ordered=False).inserted_ids)
+    return inserted
+
+
+def _make_users(rng, role, count, password_hash):
+    prefix = "synth_h" if role == "host" else "synth_t"
+    now = datetime.utcnow()
+    for i in range(1, count + 1):
+        yield {
+            "user_id": f"{prefix}{i}",
+            "first_name": role.capitalize(),
+            "last_name": str(i),
+            "email": f"{prefix}{i}@synthetic.nomad",
+            "phone": f"01{rng.randint(100000000, 999999999)}",
+            "nid": str(rng.randint(10 ** 12, 10 ** 13 - 1)),
+            "password": password_hash,
+            "role": role,
+            "verification": {"status": "approved" if role == "host" else "not_submitted"},
+            "is_verified": role == "host",
+            "max_budget": rng.choice([1000, 2000, 3000, 5000]),
+            "min_wifi_speed": rng.choice([10, 25, 50, 100]),
+            "created_at": now - timedelta(days=rng.randint(0, 365)),
+            "synthetic": True,
+        }
+
+
+def _make_spaces(rng, count, host_ids):
+    cities = list(CITY_CENTERS)
+    now = datetime.utcnow()
+    for i in range(1, count + 1):
+        city = rng.choice(cities)
+        lat, lng = CITY_CENTERS[city]
+        lat, lng = round(lat + rng.uniform(-0.08, 0.08), 4), round(lng + rng.uniform(-0.08, 0.08), 4)
+        title = f"{rng.choice(TITLE_WORDS)} {city} Stay #{i}"
+        yield {
+            "host_id": str(rng.choice(host_ids)),
+            "space_title": title,
+            "description": f"A synthetic {title.lower()} generated for testing.",
+            "location_city": city,
+            "city_key": normalize_city(city),
+            "latitude": lat,
+            "longitude": lng,
+            "location": geo_point(lat, lng),
+            "price_per_night": rng.randrange(500, 6000, 50),
+            "has_coworking_space": rng.random() < 0.4,
+            "space_type": rng.choice(SPACE_TYPES),
+            "amenities": rng.sample(AMENITIES, rng.randint(1, len(AMENITIES))),
+            "wifi_speed_mbps": rng.choice([10, 20, 30, 50, 80, 100, 150]),
+            "photos": _picsum(f"synthetic-{i}"),
+            "rating_summary": empty_rating_summary(),
+            "created_at": now - timedelta(days=rng.randint(0, 365)),
+            "synthetic": True,
+        }
+
+
+def _make_bookings(rng, count, traveler_ids, spaces):
+    today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    # space_id -> confirmed (check_in, check_out) list; overlap hole booking ta Cancelled hishebe rakha hoy,
+    # jate synthetic data o create_booking er "ek space e ek date e ekta booking" niyom mane.
+    confirmed = {}
+    for _ in range(count):
+        space = rng.choice(spaces)
+        check_in = today + timedelta(days=rng.randint(-300, 120))
+        check_out = check_in + timedelta(days=rng.randint(1, 14))
+        stays = confirmed.setdefault(space["_id"], [])
+        overlaps = any(start < check_out and end > check_in for start, end in stays)
+        status = "Cancelled" if overlaps or rng.random() < 0.1 else "Confirmed"
+        if status == "Confirmed":
+            stays.append((check_in, check_out))
+        nights, total_amount = booking_totals(check_in, check_out, space["price_per_night"])
+        yield {
+            "booking_id": str(uuid.uuid4()),
+            "user_id": str(rng.choice(traveler_ids)),
+            "space_id": str(space["_id"]),
+            "host_id": space["host_id"],
+            "space_title": space["space_title"],
+            "check_in_date": check_in.strftime('%Y-%m-%d'),
+            "check_out_date": check_out.strftime('%Y-%m-%d'),
+            "check_in": check_in,
+            "check_out": check_out,
+            "nights": nights,
+            "total_amount": total_amount,
+            "price_per_night": space["price_per_night"],
+            "guests": rng.randint(1, 4),
+            "status": status,
+            "booked_at": check_in - timedelta(days=rng.randint(1, 60)),
+            "synthetic": True,
+        }
+
+
+def _make_reviews(rng, count, traveler_ids, space_ids):
+    now = datetime.utcnow()
+    for i in range(count):
+        yield {
+            "space_id": rng.choice(space_ids),
+            "user_id": rng.choice(traveler_ids),
+            "user_name": f"Traveler {i + 1}",
+            "rating": rng.choices([1, 2, 3, 4, 5], weights=[1, 2, 4, 8, 6])[0],
+            "comment": rng.choice(COMMENTS),
+            "photo_url": None,
+            "created_at": now - timedelta(days=rng.randint(0, 300)),
+            "synthetic": True,
+        }
+
+
+def generate_synthetic_data(hosts=10, travelers=50, spaces=200, bookings=500, reviews=500, seed=None):
+    """
+    Synthetic host, traveler, space, booking ebong review toiri kore.
+    Shob user er password "password123". Returns a dict of inserted counts.
+    """
+    rng = random.Random(seed)
+    # Hash ekbar kora hoy; prottek user er jonno alada hash korle anek slow hoy.
+    password_hash = generate_password_hash("password123")
+
+    host_ids = _insert_in_batches(users_collection, _make_users(rng, "host", hosts, password_hash))
+    traveler_ids = _insert_in_batches(users_collection, _make_users(rng, "traveler", travelers, password_hash))
+
+    space_docs = list(_make_spaces(rng, spaces, host_ids)) if host_ids else []
+    space_ids = _insert_in_batches(spaces_collection, space_docs)
+
+    booking_ids = review_ids = []
+    if space_docs and traveler_ids:
+        booking_ids = _insert_in_batches(bookings_collection, _make_bookings(rng, bookings, traveler_ids, space_docs))
+        review_ids = _insert_in_batches(reviews_collection, _make_reviews(rng, reviews, traveler_ids, space_ids))
+    if review_ids:
+        rebuild_rating_summaries()
+    if booking_ids:
+        rebuild_occupied_stays()
+    if booking_ids or review_ids:
+        rebuild_popularity_scores()
+    clear_space_cache()
+
+    return {
+        "hosts": len(host_ids),
+        "travelers": len(traveler_ids),
+        "spaces": len(space_ids),
+        "bookings": len(booking_ids),
+        "reviews": len(review_ids),
+    }
+
+
+def clear_synthetic_data():
+    """generate_synthetic_data diye toiri kora shob document muche fele."""
+    deleted = {}
+    for name, collection in (("users", users_collection), ("spaces", spaces_collection),
+                             ("bookings", bookings_collection), ("reviews", reviews_collection)):
+        deleted[name] = collection.delete_many({"synthetic": True}).deleted_count
+    clear_space_cache()
+    return deleted
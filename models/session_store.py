@@ -0,0 +1,165 @@
+# models/session_store.py
+# Server-side session: browser er cookie te shudhu ekta random session id thake,
+# session er data store e (Mongo collection ba process memory) rakha hoy. Tai
+# prottek request e boro signed cookie pathate/verify korte hoy na.
+# SESSION_BACKEND=mongo (default) | memory | cookie (Flask er default signed cookie).
+
+import copy
+import secrets
+import threading
+from datetime import datetime
+
+from flask.sessions import SessionInterface, SessionMixin
+from werkzeug.datastructures import CallbackDict
+
+
+class MongoSessionStore:
+    """
+    Session gulo ekta collection e {_id: sid, data, expires_at} hishebe rakhe.
+    expires_at er TTL index expired session nije theke muche fele.
+    """
+
+    def __init__(self, collection):
+        self.collection = collection
+        self.collection.create_index("expires_at", expireAfterSeconds=0)
+
+    def load(self, sid):
+        doc = self.collection.find_one({"_id": sid})
+        # TTL monitor protiti minute e chole, tai expired document kichukkhon thakte pare.
+        if not doc or doc["expires_at"] <= datetime.utcnow():
+            return None
+        return doc["data"]
+
+    def save(self, sid, data, expires_at):
+        self.collection.replace_one({"_id": sid}, {"data": data, "expires_at": expires_at}, upsert=True)
+
+    def delete(self, sid):
+        self.collection.delete_one({"_id": sid})
+
+
+class MemorySessionStore:
+    """Process er memory te session rakhe; test ebong single-process development er jonno."""
+
+    def __init__(self):
+        self._sessions = {}  # sid -> (expires_at, data)
+        self._lock = threading.Lock()
+
+    def load(self, sid):
+        with self._lock:
+            entry = self._sessions.get(sid)
+            if not entry:
+                return None
+            if entry[0] <= datetime.utcnow():
+                del self._sessions[sid]
+                return None
+            return copy.deepcopy(entry[1])
+
+    def save(self, sid, data, expires_at):
+        with self._lock:
+            self._sessions[sid] = (expires_at, copy.deepcopy(data))
+
+    def delete(self, sid):
+        with self._lock:
+            self._sessions.pop(sid, None)
+
+
+class ServerSideSession(CallbackDict, SessionMixin):
+    """
+    Flask session object; data bodlale 'modified' set hoy. Pora ba lekha hole 'accessed'
+    set hoy, tokhon response e 'Vary: Cookie' jay.
+    """
+
+    def __init__(self, initial=None, sid=None, new=False):
+        def on_update(session):
+            session.modified = True
+            session.accessed = True
+
+        super().__init__(initial, on_update)
+        self.sid = sid
+        self.new = new
+        self.modified = False
+        # Login/logout e user bodlale notun sid deya hoy (session fixation theke bachte).
+        self.initial_user = (initial or {}).get("user_id")
+        self.accessed = False
+
+    def __getitem__(self, key):
+        self.accessed = True
+        return super().__getitem__(key)
+
+    def get(self, key, default=None):
+        self.accessed = True
+        return super().get(key, default)
+
+    def setdefault(self, key, default=None):
+        self.accessed = True
+        return super().setdefault(key, default)
+
+    def __contains__(self, key):
+        # Route gulo "'user_id' in session" diye login check kore, tai eta o pora.
+        self.accessed = True
+        return super().__contains__(key)
+
+
+class ServerSideSessionInterface(SessionInterface):
+    """Cookie te shudhu sid; data 'store' (MongoSessionStore ba MemorySessionStore) e."""
+
+    def __init__(self, store):
+        self.store = store
+
+    def _new_sid(self):
+        return secrets.token_urlsafe(32)
+
+    def open_session(self, app, request):
+        sid = request.cookies.get(self.get_cookie_name(app))
+        if sid:
+            data = self.store.load(sid)
+            if data is not None:
+                return ServerSideSession(data, sid=sid)
+        return ServerSideSession(sid=self._new_sid(), new=True)
+
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+
+        # Session pora hoyeche mane response ei user er cookie er upor nirbhor kore;
+        # proxy jeno onno user ke ei cached response na dey (Flask er default er moto).
+        if session.accessed:
+            response.vary.add("Cookie")
+
+        if not session:
+            # Khali session (logout): store theke muche cookie o muche deya hoy.
+            if session.modified and not session.new:
+                self.store.delete(session.sid)
+                response.delete_cookie(name, domain=domain, path=path)
+            return
+
+        if not self.should_set_cookie(app, session):
+            return
+        if session.get("user_id") != session.initial_user and not session.new:
+            self.store.delete(session.sid)
+            session.sid = self._new_sid()
+        expires_at = datetime.utcnow() + app.permanent_session_lifetime
+        self.store.save(session.sid, dict(session), expires_at)
+        response.set_cookie(
+            name,
+            session.sid,
+            expires=self.get_expiration_time(app, session),
+            httponly=self.get_cookie_httponly(app),
+            domain=domain,
+            path=path,
+            secure=self.get_cookie_secure(app),
+            samesite=self.get_cookie_samesite(app),
+        )
+
+
+def make_session_interface(backend, db=None):
+    """
+    SESSION_BACKEND value theke session interface banay. 'cookie' hole None
+    (Flask er default signed cookie session e thake).
+    """
+    if backend == "cookie":
+        return None
+    if backend == "memory":
+        return ServerSideSessionInterface(MemorySessionStore())
+    return ServerSideSessionInterface(MongoSessionStore(db.sessions))
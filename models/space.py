@@ -2,13 +2,78 @@
 # Ei file ta space (jemn: apartment, room) toiri, update, delete, ebong khujar kaaj kore.
 
 import os
-from pymongo import MongoClient, ASCENDING, DESCENDING
+import json
+import base64
+import binascii
+from pymongo import MongoClient, ASCENDING, DESCENDING, TEXT, GEOSPHERE, UpdateOne
+from bson import json_util
 from bson.objectid import ObjectId
 from datetime import datetime
 import re
 # We need to create sample hosts, so we need access to the users collection and password hashing
 from .user import db, users_collection
 from werkzeug.security import generate_password_hash
+from . import query_advisor
+from .cache import PartitionedCache, MongoVersionCounter
+
+
+# Managed index set for the spaces collection, designed from the predicate
+# combinations filter_spaces produces. Order follows ESR: Equality fields first,
+# then the Sort key (with the '_id' tie-breaker), then Range fields. The city
+# prefix match behaves like equality for full city names, so it leads.
+SPACE_INDEXES = [
+    # No filter / price range only, sorted by price
+    [("price_per_night", ASCENDING), ("_id", ASCENDING)],
+    # City (+ price range), sorted by price or default
+    [("city_key", ASCENDING), ("price_per_night", ASCENDING), ("_id", ASCENDING)],
+    # City + space type / coworking
+    [("city_key", ASCENDING), ("space_type", ASCENDING), ("price_per_night", ASCENDING)],
+    [("has_coworking_space", ASCENDING), ("city_key", ASCENDING), ("price_per_night", ASCENDING)],
+    # Space type without a city
+    [("space_type", ASCENDING), ("price_per_night", ASCENDING), ("_id", ASCENDING)],
+    # Amenities ($all uses the first amenity for index bounds)
+    [("amenities", ASCENDING), ("price_per_night", ASCENDING)],
+    # Host listings (/spaces/my-listings), default and price sort
+    [("host_id", ASCENDING), ("_id", ASCENDING)],
+    [("host_id", ASCENDING), ("price_per_night", ASCENDING), ("_id", ASCENDING)],
+    # Rating sort
+    [("rating_summary.average", DESCENDING), ("_id", DESCENDING)],
+    # Popular spaces in a city (suggestions): covered top-k scan when only '_id' is projected
+    [("city_key", ASCENDING), ("popularity_score", DESCENDING), ("_id", ASCENDING)],
+    # "Near me" radius / bounding box search
+    [("location", GEOSPHERE)],
+    # Keyword search; title matches count more than description matches
+    ([("space_title", TEXT), ("description", TEXT)],
+     {"name": "space_text", "weights": {"space_title": 5, "description": 1}}),
+]
+
+
+def ensure_space_indexes(collection):
+    """
+    Managed index gulo toiri kore (already thakle MongoDB kichu kore na).
+    Entry ta shudhu key list ba (keys, options) hote pare. Returns the index names.
+    """
+    names = []
+    for entry in SPACE_INDEXES:
+        keys, options = entry if isinstance(entry, tuple) else (entry, {})
+        names.append(collection.create_index(keys, **options))
+    return names
+
+
+def sync_space_indexes(collection, drop=False):
+    """
+    Managed index gulo toiri kore ebong je index gulo managed set e nei shegular naam return kore.
+    drop=True hole oi unmanaged index gulo (jemon purono single-field index) drop kore dey.
+    """
+    managed = set(ensure_space_indexes(collection))
+    unmanaged = [
+        name for name in collection.index_information()
+        if name != "_id_" and name not in managed
+    ]
+    if drop:
+        for name in unmanaged:
+            collection.drop_index(name)
+    return unmanaged
 
 
 try:
@@ -17,20 +82,148 @@ try:
     db = client.get_database("nomadnest")
     spaces_collection = db.spaces
     
-    spaces_collection.create_index([("price_per_night", ASCENDING)])
-    spaces_collection.create_index([("location_city", ASCENDING)])
-    spaces_collection.create_index([("has_coworking_space", ASCENDING)])
+    ensure_space_indexes(spaces_collection)
     print("Space Model: MongoDB connected successfully.")
 except Exception as e:
     print(f"Space Model: Error connecting to MongoDB: {e}")
 
 
+# --- Projection profiles ---
+
+# List view gulo puro space document er bodole shudhu dorkari field ane. Profile name
+# (jemon 'card') model function gulote 'projection' hishebe deya jay; None mane puro document.
+
+# Server nijer jonno je field rakhe (booking er stay list, popularity sort key); API/detail response e jay na.
+INTERNAL_FIELDS = ('occupied', 'popularity_score')
+
+PROJECTIONS = {
+    # Listing/favorite/suggestion card: title, city, type, price, rating ar prothom photo.
+    'card': {
+        'space_title': 1, 'location_city': 1, 'city_key': 1, 'space_type': 1,
+        'price_per_night': 1, 'has_coworking_space': 1, 'host_id': 1,
+        'rating_summary.average': 1, 'rating_summary.count': 1,
+        'photos': {'$slice': 1},
+    },
+    # Space detail page/API: puro document, shudhu internal field bad.
+    'detail': {field: 0 for field in INTERNAL_FIELDS},
+    # Map marker
+    'map_point': {'space_title': 1, 'price_per_night': 1, 'space_type': 1, 'location': 1},
+    # Data export: shob user-entered field, shudhu derived/internal field bad.
+    'export': {'city_key': 0, 'location': 0, 'rating_summary.histogram': 0, **{field: 0 for field in INTERNAL_FIELDS}},
+}
+
+
+def resolve_projection(projection):
+    """Profile name ke projection dict e convert kore; dict ba None hole jemon ache temon."""
+    if isinstance(projection, str):
+        return PROJECTIONS.get(projection)
+    return projection
+
+
+def _projection_with_fields(projection, fields):
+    """
+    Projection e 'fields' (jemon sort key) jeno thake: inclusion projection e add kora hoy,
+    exclusion projection theke bad deya hoy. Parent field already included thakle kichu kore na.
+    """
+    if not projection:
+        return projection
+    projection = dict(projection)
+    inclusion = any(value not in (0, False) for key, value in projection.items() if key != '_id')
+    for field in fields:
+        if inclusion:
+            if not any(field == key or field.startswith(key + '.') for key in projection):
+                projection[field] = 1
+        else:
+            projection.pop(field, None)
+    return projection
+
+
+def _project_stage(projection):
+    """find() projection ke aggregation $project stage e convert kore ($slice er syntax alada)."""
+    stage = {}
+    for field, value in projection.items():
+        if isinstance(value, dict) and '$slice' in value:
+            value = {'$slice': ['$' + field, value['$slice']]}
+        stage[field] = value
+    return {'$project': stage}
+
+
 # --- Core CRUD & Filter Functions ---
 
+RATING_STARS = (1, 2, 3, 4, 5)
+
+def empty_rating_summary():
+    """
+    Notun space er jonno khali rating summary. Review insert howar shomoy
+    models.review eta $inc diye update kore.
+    """
+    return {
+        "count": 0,
+        "sum": 0,
+        "average": 0,
+        "histogram": {str(star): 0 for star in RATING_STARS}
+    }
+
+def normalize_city(city):
+    """
+    City name ke search er jonno normalized key te convert kore
+    (extra whitespace bad, case-fold), jemon "  Cox's  Bazar" -> "cox's bazar".
+    """
+    if not city:
+        return ""
+    return " ".join(str(city).split()).casefold()
+
+def geo_point(latitude, longitude):
+    """
+    Latitude/longitude theke GeoJSON Point toiri kore (2dsphere index er jonno).
+    Invalid ba range er baire hole None return kore.
+    """
+    try:
+        lat, lng = float(latitude), float(longitude)
+    except (ValueError, TypeError):
+        return None
+    if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+        return None
+    # GeoJSON e order holo [longitude, latitude].
+    return {"type": "Point", "coordinates": [lng, lat]}
+
+def canonical_photo_ref(path):
+    """
+    Photo reference er canonical form: http(s) URL hole jemon ache temon; nahole static
+    folder er relative path 'uploads/<file>', jate template e url_for('static', filename=...) chole.
+    Purono 'static/uploads/...', backslash ba absolute filesystem path o ei form e ashe.
+    """
+    if not path:
+        return None
+    path = str(path).strip().replace("\\", "/")
+    if path.startswith(("http://", "https://")):
+        return path
+    if "/static/" in path:
+        path = path.split("/static/", 1)[1]
+    elif path.startswith("static/"):
+        path = path[len("static/"):]
+    path = path.lstrip("/")
+    if not path.startswith("uploads/"):
+        path = "uploads/" + os.path.basename(path)
+    return path
+
+def canonical_photos(photos):
+    """Photo list er prottek reference canonical kore; khali entry bad."""
+    return [ref for ref in map(canonical_photo_ref, photos or []) if ref]
+
 def create_space(space_data):
     """Database e ekta notun space toiri kore ebong save kore."""
     space_data["created_at"] = datetime.utcnow()
-    return spaces_collection.insert_one(space_data)
+    if "photos" in space_data:
+        space_data["photos"] = canonical_photos(space_data["photos"])
+    space_data["city_key"] = normalize_city(space_data.get("location_city"))
+    location = geo_point(space_data.get("latitude"), space_data.get("longitude"))
+    if location:
+        space_data["location"] = location
+    space_data.setdefault("rating_summary", empty_rating_summary())
+    result = spaces_collection.insert_one(space_data)
+    invalidate_space_cache(space_data)
+    return result
 
 def get_space_by_id(space_id):
     """Ekta nirdishto space ke tar unique ID diye database theke fetch kore."""
@@ -41,31 +234,246 @@ def get_space_by_id(space_id):
 
 def update_space(space_id, data):
     """Ekta space er information update kore."""
-    return spaces_collection.update_one(
+    if "photos" in data:
+        data["photos"] = canonical_photos(data["photos"])
+    if "location_city" in data:
+        data["city_key"] = normalize_city(data["location_city"])
+    if "latitude" in data and "longitude" in data:
+        location = geo_point(data["latitude"], data["longitude"])
+        if location:
+            data["location"] = location
+    # Cache er kon partition bodlabe sheta janar jonno ager city/host neya hocche.
+    before = spaces_collection.find_one({"_id": ObjectId(space_id)}, CACHE_PARTITION_FIELDS)
+    result = spaces_collection.update_one(
         {"_id": ObjectId(space_id)},
         {"$set": data}
     )
+    if before:
+        invalidate_space_cache(before, dict(before, **data))
+    return result
 
 def delete_space(space_id):
     """Ekta space ke database theke delete kore."""
-    return spaces_collection.delete_one({"_id": ObjectId(space_id)})
+    before = spaces_collection.find_one({"_id": ObjectId(space_id)}, CACHE_PARTITION_FIELDS)
+    result = spaces_collection.delete_one({"_id": ObjectId(space_id)})
+    invalidate_space_cache(before)
+    return result
 
-def get_all_spaces():
-    """Database theke shob space fetch kore."""
-    return list(spaces_collection.find().sort("created_at", DESCENDING))
+def get_all_spaces(projection=None):
+    """Database theke shob space fetch kore. projection: profile name (jemon 'card') ba dict."""
+    return list(spaces_collection.find({}, resolve_projection(projection)).sort("created_at", DESCENDING))
 
-def get_spaces_by_host(host_id):
+def get_spaces_by_host(host_id, projection=None):
     """Ekjon nirdishto host er toiri kora shob space fetch kore."""
-    return list(spaces_collection.find({"host_id": host_id}).sort("created_at", DESCENDING))
+    return list(
+        spaces_collection.find({"host_id": host_id}, resolve_projection(projection)).sort("created_at", DESCENDING)
+    )
+
+
+# --- Search result cache ---
+
+def _env_flag(name):
+    return os.getenv(name, "").lower() in ("1", "true", "yes")
+
+# filter_spaces er result cache. SPACE_CACHE_SYNC=1 hole onno worker der shathe
+# 'counters' collection er ekta version document diye invalidation share hoy.
+space_search_cache = PartitionedCache(
+    max_entries=int(os.getenv("SPACE_CACHE_SIZE", "256")),
+    ttl_seconds=float(os.getenv("SPACE_CACHE_TTL", "60")),
+    version_counter=MongoVersionCounter(db.counters, "space_search_cache") if _env_flag("SPACE_CACHE_SYNC") else None
+)
+
+# Space er je field gulo theke cache partition (city, host, map location) ber kora hoy.
+CACHE_PARTITION_FIELDS = {"location_city": 1, "city_key": 1, "host_id": 1, "location": 1}
+
+# Onno module er cache (jemon map cluster) space change hole jante chaile ekhane
+# callback register kore. Callback ta changed space list pay, ba None (shob bodlano).
+_space_change_listeners = []
+
+
+def on_space_change(listener):
+    """
+    Space listing create/update/delete hole listener(spaces) call hobe; bulk change e
+    listener(None). Shudhu derived field (occupied, rating_summary) bodlale call hoy na.
+    """
+    _space_change_listeners.append(listener)
+    return listener
+
+
+def _canonical_filters(filters):
+    """Filter dictionary er canonical form: khali value bad, city normalized, list sorted."""
+    canonical = {}
+    for key, value in filters.items():
+        if not value:
+            continue
+        if key == 'location':
+            value = normalize_city(value)
+        elif isinstance(value, (list, tuple)):
+            value = sorted(value)
+        canonical[key] = value
+    return canonical
+
+
+def _search_cache_key(filters, user_profile, cursor, page_size, projection=None):
+    """
+    Canonical filter theke cache key banay. best_match er jonno profile er
+    dorkari field ebong projection o key te thake.
+    """
+    canonical = _canonical_filters(filters)
+    if filters.get('sort_by') == 'best_match' and user_profile:
+        canonical['profile'] = {field: user_profile.get(field) for field in BEST_MATCH_PROFILE_FIELDS}
+    return json.dumps([canonical, cursor, page_size, projection], sort_keys=True, default=str)
+
+
+def _search_cache_partitions(filters):
+    return {
+        "city": normalize_city(filters.get('location')) or None,
+        "host": filters.get('host_id') or None,
+    }
+
+
+def invalidate_space_cache(*spaces, listing_changed=True):
+    """
+    Ei space gulo (ager ba porer version) je cached search result e thakte pare,
+    shegulo muche fele: city prefix mile ebong host mile (ba filter e na thakle).
+    listing_changed=False (booking er occupied, review er rating_summary) hole shudhu
+    search cache; on_space_change listener (jemon map cluster) call hoy na.
+    """
+    spaces = [space for space in spaces if space]
+    if not spaces:
+        return
+    if listing_changed:
+        for listener in _space_change_listeners:
+            listener(spaces)
+    targets = [
+        (space.get("city_key") or normalize_city(space.get("location_city")), str(space.get("host_id")))
+        for space in spaces
+    ]
+
+    def affected(partitions):
+        return any(
+            (not partitions.get("city") or city.startswith(partitions["city"]))
+            and (not partitions.get("host") or partitions["host"] == host)
+            for city, host in targets
+        )
+    space_search_cache.invalidate(affected)
+
+
+def clear_space_cache(listing_changed=True):
+    """
+    Bulk write (seeding, migration) er por puro search cache invalidate kore.
+    listing_changed=False hole on_space_change listener call hoy na (invalidate_space_cache er moto).
+    """
+    if listing_changed:
+        for listener in _space_change_listeners:
+            listener(None)
+    space_search_cache.invalidate(lambda partitions: True)
+
+
+def get_search_cache_stats():
+    """Search cache er hit/miss/eviction counter gulo."""
+    return space_search_cache.stats()
+
+
+# --- Listing pagination ---
+
+# Listing page gulo ekbare koyta space dekhabe.
+DEFAULT_PAGE_SIZE = 24
+
+# Prottek sort option er jonno MongoDB sort spec. Shob shesh e '_id' thake
+# jate same price er space gulor order stable thake (keyset pagination er jonno dorkar).
+SORT_SPECS = {
+    'price_asc': [('price_per_night', ASCENDING), ('_id', ASCENDING)],
+    'price_desc': [('price_per_night', DESCENDING), ('_id', DESCENDING)],
+    'rating_desc': [('rating_summary.average', DESCENDING), ('_id', DESCENDING)],
+}
+DEFAULT_SORT_SPEC = [('_id', ASCENDING)]
+
+
+def encode_cursor(sort_by, values, direction):
+    """Sort key values ke ekta URL-safe opaque cursor string e encode kore."""
+    payload = json_util.dumps({"s": sort_by or "", "d": direction, "v": values})
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+
+def decode_cursor(cursor, sort_by, sort_spec=None):
+    """
+    Cursor string theke (direction, values) ber kore.
+    Invalid ba onno sort er cursor hole None return kore, tokhon prothom page dekhano hoy.
+    sort_spec deya thakle value er shonkha tar field shonkhar shoman na hole o None.
+    """
+    if not cursor:
+        return None
+    try:
+        payload = json_util.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+    except (ValueError, TypeError, binascii.Error):
+        return None
+    if not isinstance(payload, dict) or payload.get("s") != (sort_by or ""):
+        return None
+    if payload.get("d") not in ("after", "before") or not isinstance(payload.get("v"), list):
+        return None
+    if sort_spec is not None and len(payload["v"]) != len(sort_spec):
+        return None
+    return payload["d"], payload["v"]
+
+
+def _keyset_clause(sort_spec, values, backwards=False):
+    """
+    Builds the $or predicate that selects documents strictly after (or before)
+    the given sort key values, respecting each field's sort direction.
+    """
+    clauses = []
+    for i, (field, direction) in enumerate(sort_spec):
+        ascending = (direction == ASCENDING) != backwards
+        clause = {f: v for (f, _), v in zip(sort_spec[:i], values[:i])}
+        clause[field] = {'$gt' if ascending else '$lt': values[i]}
+        clauses.append(clause)
+    return {'$or': clauses}
+
+
+def _sort_key_values(space, sort_spec):
+    values = []
+    for field, _ in sort_spec:
+        # Nested field (jemon 'rating_summary.average') er value dot path dhore ber kora hocche.
+        value = space
+        for part in field.split('.'):
+            value = value.get(part) if isinstance(value, dict) else None
+        values.append(value)
+    return values
 
 
-def filter_spaces(filters, user_profile=None):
-    """Bivinno criteria'r upor base kore space filter kore."""
+def _build_page(items, sort_by, key_of, page_size, position):
+    """
+    Fetch kora (page_size + 1) ta item theke page, next_cursor ebong prev_cursor toiri kore.
+    'position' holo decode kora cursor er direction (None mane prothom page).
+    """
+    has_more = len(items) > page_size
+    items = items[:page_size]
+    if position == 'before':
+        # Pichoner dike fetch kora hoyeche, tai order ulta kore deya hocche.
+        items.reverse()
+        has_next, has_prev = True, has_more
+    else:
+        has_next, has_prev = has_more, position is not None
+
+    next_cursor = prev_cursor = None
+    if items:
+        if has_next:
+            next_cursor = encode_cursor(sort_by, key_of(items[-1]), 'after')
+        if has_prev:
+            prev_cursor = encode_cursor(sort_by, key_of(items[0]), 'before')
+    return {"spaces": items, "next_cursor": next_cursor, "prev_cursor": prev_cursor}
+
+
+def build_space_query(filters):
+    """Filter dictionary theke MongoDB query toiri kore."""
     query = {}
     
-    # Text search for location
-    if filters.get('location'):
-        query['location_city'] = re.compile(filters['location'], re.IGNORECASE)
+    # City prefix match on the normalized city_key. Anchored, case-sensitive regex
+    # on an already lower-cased field can use the city_key index.
+    city_key = normalize_city(filters.get('location'))
+    if city_key:
+        query['city_key'] = re.compile('^' + re.escape(city_key))
         
     # Price range filter
     min_price = filters.get('min_price')
@@ -101,42 +509,506 @@ def filter_spaces(filters, user_profile=None):
     if filters.get('host_id'):
         query['host_id'] = filters['host_id']
 
-    # Find matching spaces
-    spaces = list(spaces_collection.find(query))
-
-    # Sort results
-    sort_by = filters.get('sort_by')
-    if sort_by == 'price_asc':
-        spaces.sort(key=lambda x: x['price_per_night'])
-    elif sort_by == 'price_desc':
-        spaces.sort(key=lambda x: x['price_per_night'], reverse=True)
-    elif sort_by == 'best_match' and user_profile:
-        # 'Best Match' sorting logic
-        def calculate_score(space):
-            score = 0
-            # Budget match
-            if space['price_per_night'] <= user_profile.get('max_budget', 99999):
-                score += 20
-            # Wifi speed match
-            if space.get('wifi_speed_mbps', 0) >= user_profile.get('min_wifi_speed', 0):
-                score += 15
-            # Location preference could be added here if we stored it
-            return score
-        
-        spaces.sort(key=calculate_score, reverse=True)
-        
-    return spaces
+    # Keyword search on title and description (text index)
+    if (filters.get('q') or '').strip():
+        query['$text'] = {'$search': filters['q'].strip()}
 
-def get_popular_spaces_in_location(location, limit=4, exclude_id=None):
+    # "Near me" radius ba map bounding box (2dsphere index)
+    geo = parse_geo_filters(filters)
+    if geo:
+        query['location'] = {'$geoWithin': geo['within']} if geo['within'] else {'$exists': True}
+        if geo.get('bounds'):
+            # Polygon er edge geodesic (bbox er rekha theke beke jay), tai coordinate range o mile.
+            min_lng, min_lat, max_lng, max_lat = geo['bounds']
+            query['location.coordinates.0'] = {'$gte': min_lng, '$lte': max_lng}
+            query['location.coordinates.1'] = {'$gte': min_lat, '$lte': max_lat}
+
+    # Date range e free space: 'occupied' er kono stay er shathe overlap korle bad.
+    stay = parse_stay_dates(filters.get('check_in'), filters.get('check_out'))
+    if stay:
+        query['occupied'] = {'$not': {'$elemMatch': occupied_overlap(*stay)}}
+
+    return query
+
+
+# Booking/search form er date format (input type="date").
+STAY_DATE_FORMAT = '%Y-%m-%d'
+
+
+def parse_stay_dates(check_in, check_out):
     """
-    Finds other popular spaces in the same location, excluding the current one.
+    'YYYY-MM-DD' string duita theke (check_in, check_out) datetime return kore.
+    Format bhul hole ba check_out check_in er age/same din hole None return kore.
     """
-    query = {"location_city": location}
+    try:
+        start = datetime.strptime(check_in, STAY_DATE_FORMAT)
+        end = datetime.strptime(check_out, STAY_DATE_FORMAT)
+    except (TypeError, ValueError):
+        return None
+    if end <= start:
+        return None
+    return start, end
+
+
+def occupied_overlap(check_in, check_out):
+    """Space er 'occupied' list er je stay gulo [check_in, check_out) er shathe overlap kore."""
+    return {'check_in': {'$lt': check_out}, 'check_out': {'$gt': check_in}}
+
+
+# Radius search er default ebong shorbochcho radius (km).
+DEFAULT_RADIUS_KM = 10
+MAX_RADIUS_KM = 500
+EARTH_RADIUS_KM = 6378.1
+# Web map (Mercator) er latitude seema. Pole e (±90) polygon er corner gulo ek i point
+# hoye jay, tai MongoDB invalid polygon error dey; bbox er latitude ekhane clamp kora hoy.
+MAX_MAP_LATITUDE = 85.05112878
+
+
+def _parse_bbox(bbox):
+    """
+    'minLng,minLat,maxLng,maxLat' string ke float tuple e convert kore; invalid hole None.
+    Latitude ±MAX_MAP_LATITUDE e clamp hoy.
+    """
+    try:
+        min_lng, min_lat, max_lng, max_lat = (float(v) for v in bbox.split(','))
+    except (ValueError, TypeError, AttributeError):
+        return None
+    if not (-180 <= min_lng < max_lng <= 180 and -90 <= min_lat < max_lat <= 90):
+        return None
+    min_lat, max_lat = max(min_lat, -MAX_MAP_LATITUDE), min(max_lat, MAX_MAP_LATITUDE)
+    if min_lat >= max_lat:
+        return None
+    return min_lng, min_lat, max_lng, max_lat
+
+
+def parse_geo_filters(filters):
+    """
+    Filter theke geo search ber kore: 'bbox' (map view) ba 'lat' + 'lng' + 'radius_km'.
+    Returns {'center': GeoJSON point, 'within': $geoWithin shape ba None, 'bounds'
+    (shudhu bbox e: lng/lat range)} or None.
+    """
+    box = _parse_bbox(filters.get('bbox'))
+    if box:
+        min_lng, min_lat, max_lng, max_lat = box
+        ring = [[min_lng, min_lat], [max_lng, min_lat], [max_lng, max_lat], [min_lng, max_lat], [min_lng, min_lat]]
+        return {
+            'center': geo_point((min_lat + max_lat) / 2, (min_lng + max_lng) / 2),
+            # Ordhek prithibir cheye choura polygon ke 2dsphere ulto dik (baki prithibi) bujhay;
+            # tokhon shudhu 'bounds' er coordinate range diye filter hoy.
+            'within': {'$geometry': {'type': 'Polygon', 'coordinates': [ring]}} if max_lng - min_lng < 180 else None,
+            'bounds': box,
+        }
+
+    center = geo_point(filters.get('lat'), filters.get('lng')) if filters.get('lat') and filters.get('lng') else None
+    if not center:
+        return None
+    try:
+        radius_km = float(filters.get('radius_km') or DEFAULT_RADIUS_KM)
+    except (ValueError, TypeError):
+        radius_km = DEFAULT_RADIUS_KM
+    radius_km = min(max(radius_km, 0.1), MAX_RADIUS_KM)
+    return {
+        'center': center,
+        'within': {'$centerSphere': [center['coordinates'], radius_km / EARTH_RADIUS_KM]},
+    }
+
+
+def filter_spaces(filters, user_profile=None, cursor=None, page_size=DEFAULT_PAGE_SIZE, with_facets=False,
+                  projection=None):
+    """
+    Bivinno criteria'r upor base kore space filter kore ebong ekta page return kore.
+
+    Returns a dict with 'spaces' (at most page_size items) and opaque
+    'next_cursor' / 'prev_cursor' strings (None when there is no such page).
+    Sorting and limiting happen inside MongoDB; ties are broken on '_id'.
+    Results are served from space_search_cache when an identical search was seen recently.
+    with_facets=True hole filter sidebar er jonno 'facets' (see get_space_facets) o thake.
+    projection: profile name (jemon 'card') ba dict; sort key field gulo shob shomoy thake.
+    """
+    key = _search_cache_key(filters, user_profile, cursor, page_size, projection)
+    hit, page = space_search_cache.get(key)
+    if not hit:
+        page = _filter_spaces_uncached(filters, user_profile, cursor, page_size, resolve_projection(projection))
+        space_search_cache.set(key, page, _search_cache_partitions(filters))
+    if with_facets:
+        page['facets'] = get_space_facets(filters)
+    return page
+
+
+def _ranking_mode(query, sort_by, user_profile, geo):
+    """
+    Kon path e sort hobe: 'best_match', 'relevance', 'distance' ba 'default' (SORT_SPECS).
+    Same sort_by o login, keyword ba geo filter onujayi alada path e jete pare.
+    """
+    if sort_by == 'best_match' and user_profile:
+        return 'best_match'
+    # Keyword search e onno kono sort na thakle relevance (text score) diye sort hoy.
+    if '$text' in query and sort_by not in SORT_SPECS:
+        return 'relevance'
+    # Geo search e onno kono sort na thakle kache theke dure (distance) sort hoy.
+    # $geoNear ar $text ek pipeline e chole na, tai keyword thakle upore relevance jete.
+    if geo and sort_by not in SORT_SPECS:
+        return 'distance'
+    return 'default'
+
+
+def _filter_spaces_uncached(filters, user_profile, cursor, page_size, projection=None):
+    query = build_space_query(filters)
+    sort_by = filters.get('sort_by') or ''
+    geo = parse_geo_filters(filters)
+    mode = _ranking_mode(query, sort_by, user_profile, geo)
+    sort_spec = {
+        'best_match': BEST_MATCH_SORT_SPEC,
+        'relevance': RELEVANCE_SORT_SPEC,
+        'distance': DISTANCE_SORT_SPEC,
+    }.get(mode) or SORT_SPECS.get(sort_by, DEFAULT_SORT_SPEC)
+    # Cursor e mode o thake: onno path er cursor (jemon logout obosthay banano best_match
+    # page link login kore khulle) er key values ei sort e mile na, tai prothom page.
+    cursor_name = f"{sort_by}:{mode}"
+    position = decode_cursor(cursor, cursor_name, sort_spec)
+
+    if mode == 'best_match':
+        return _filter_spaces_ranked(
+            "filter_spaces.best_match", query,
+            [{'$match': query}, {'$addFields': {'match_score': best_match_score_expr(user_profile, filters)}}],
+            sort_spec, cursor_name, position, page_size, projection
+        )
+    if mode == 'relevance':
+        return _filter_spaces_ranked(
+            "filter_spaces.relevance", query,
+            [{'$match': query}, {'$addFields': {'text_score': {'$meta': 'textScore'}}}],
+            sort_spec, cursor_name, position, page_size, projection
+        )
+    if mode == 'distance':
+        return _filter_spaces_ranked(
+            "filter_spaces.distance", query,
+            [{'$geoNear': {
+                'near': geo['center'],
+                'distanceField': 'distance_m',
+                'query': query,
+                'spherical': True,
+            }}],
+            sort_spec, cursor_name, position, page_size, projection
+        )
+
+    backwards = position is not None and position[0] == 'before'
+    if position:
+        query = {'$and': [query, _keyset_clause(sort_spec, position[1], backwards)]}
+    if backwards:
+        mongo_sort = [(field, -direction) for field, direction in sort_spec]
+    else:
+        mongo_sort = sort_spec
+
+    # Shudhu ei page er jonno dorkar (page_size + 1) ta document ana hocche.
+    projection = _projection_with_fields(projection, [field for field, _ in sort_spec])
+    cursor = spaces_collection.find(query, projection).sort(mongo_sort).limit(page_size + 1)
+    query_advisor.record("filter_spaces", cursor, query, mongo_sort)
+    items = list(cursor)
+    return _build_page(
+        items, cursor_name, lambda s: _sort_key_values(s, sort_spec), page_size,
+        position[0] if position else None
+    )
+
+
+# --- API listing (/api/spaces) ---
+
+# /api/spaces notun theke purono order e dey; '_id' er default index e keyset pagination chole.
+NEWEST_SORT_SPEC = [('_id', DESCENDING)]
+MAX_API_PAGE_SIZE = 100
+# Streaming e MongoDB theke ekbare koyta document ashbe (memory ei batch er moddhe thake).
+STREAM_BATCH_SIZE = 500
+
+_FIELD_NAME = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*(\.[A-Za-z0-9_]+)*$')
+
+
+def parse_fields(fields):
+    """
+    'fields=space_title,price_per_night,photos' theke MongoDB projection banay.
+    '_id' shob shomoy thake (cursor er jonno dorkar). Khali ba invalid hole None (puro document).
+    INTERNAL_FIELDS chaileo deya hoy na.
+    """
+    if isinstance(fields, str):
+        fields = fields.split(',')
+    names = [name.strip() for name in fields or [] if name and name.strip()]
+    if not names or not all(_FIELD_NAME.match(name) for name in names):
+        return None
+    projection = {name: 1 for name in names if name.split('.')[0] not in INTERNAL_FIELDS}
+    projection['_id'] = 1
+    return projection
+
+
+def get_spaces_page(cursor=None, page_size=DEFAULT_PAGE_SIZE, projection=None):
+    """
+    Shob space er ekta page, notun theke purono. filter_spaces er moto
+    {'spaces', 'next_cursor', 'prev_cursor'} return kore.
+    """
+    projection = resolve_projection(projection)
+    page_size = min(max(page_size, 1), MAX_API_PAGE_SIZE)
+    position = decode_cursor(cursor, 'newest', NEWEST_SORT_SPEC)
+    backwards = position is not None and position[0] == 'before'
+    query = _keyset_clause(NEWEST_SORT_SPEC, position[1], backwards) if position else {}
+    direction = ASCENDING if backwards else DESCENDING
+    items = list(spaces_collection.find(query, projection).sort('_id', direction).limit(page_size + 1))
+    return _build_page(
+        items, 'newest', lambda s: _sort_key_values(s, NEWEST_SORT_SPEC), page_size,
+        position[0] if position else None
+    )
+
+
+def iter_spaces(projection=None, cursor=None, limit=0):
+    """
+    Shob space ke (ba cursor er porer gulo) ekta ekta kore yield kore, notun theke purono.
+    MongoDB cursor batch e fetch kore, tai space joto beshi hok memory ek batch er beshi lage na.
+    """
+    position = decode_cursor(cursor, 'newest', NEWEST_SORT_SPEC)
+    query = _keyset_clause(NEWEST_SORT_SPEC, position[1]) if position and position[0] == 'after' else {}
+    mongo_cursor = (
+        spaces_collection.find(query, resolve_projection(projection))
+        .sort('_id', DESCENDING)
+        .batch_size(STREAM_BATCH_SIZE)
+        .limit(limit)
+    )
+    try:
+        for space in mongo_cursor:
+            yield space
+    finally:
+        # Client majhpothe connection kete dile server-side cursor o bondho hoy.
+        mongo_cursor.close()
+
+
+# --- Filter sidebar facets ---
+
+# Price facet er bucket boundary (BDT per night); shesh bucket er upore shob "default" e jay.
+PRICE_FACET_BOUNDARIES = [0, 1000, 2000, 3000, 5000]
+# City facet e koyta city dekhano hobe (count onujayi).
+CITY_FACET_LIMIT = 20
+
+# Facet name -> oi facet er nijer filter je query field e thake. Ekta facet er count
+# oi field er filter bad diye gona hoy, jate (jemon) ekta space type select korleo
+# onno type gulor count dekha jay. Amenities $all, tai oigulo shob filter shoho gona hoy.
+FACET_QUERY_FIELDS = {
+    'cities': 'city_key',
+    'space_types': 'space_type',
+    'price_buckets': 'price_per_night',
+    'coworking': 'has_coworking_space',
+}
+
+
+def _facet_pipeline(query):
+    """
+    Ekta $facet pass e shob facet count er pipeline. Je clause gulo kono facet er
+    nijer na (keyword, geo, host, amenities) shegulo shurute ekbar $match hoy.
+    """
+    faceted = set(FACET_QUERY_FIELDS.values())
+    common = {field: clause for field, clause in query.items() if field not in faceted}
+
+    def others(own=None):
+        return {'$match': {field: clause for field, clause in query.items() if field in faceted and field != own}}
+
+    def counts(field):
+        return [{'$group': {'_id': field, 'count': {'$sum': 1}}}, {'$sort': {'count': -1, '_id': 1}}]
+
+    return [
+        {'$match': common},
+        {'$facet': {
+            'cities': [
+                others('city_key'),
+                {'$group': {'_id': '$city_key', 'label': {'$first': '$location_city'}, 'count': {'$sum': 1}}},
+                {'$sort': {'count': -1, '_id': 1}},
+                {'$limit': CITY_FACET_LIMIT},
+            ],
+            'space_types': [others('space_type')] + counts('$space_type'),
+            'amenities': [others(), {'$unwind': '$amenities'}] + counts('$amenities'),
+            'price_buckets': [
+                others('price_per_night'),
+                {'$bucket': {
+                    'groupBy': '$price_per_night',
+                    'boundaries': PRICE_FACET_BOUNDARIES + [10 ** 9],
+                    'default': 'other',
+                    'output': {'count': {'$sum': 1}},
+                }},
+            ],
+            'coworking': [others('has_coworking_space')] + counts({'$eq': ['$has_coworking_space', True]}),
+        }},
+    ]
+
+
+def _shape_facets(raw):
+    """$facet er raw output ke template/API friendly list e convert kore."""
+    buckets = {bucket['_id']: bucket['count'] for bucket in raw.get('price_buckets', [])}
+    bounds = PRICE_FACET_BOUNDARIES + [None]
+    coworking = {bool(row['_id']): row['count'] for row in raw.get('coworking', [])}
+    return {
+        'cities': [
+            {'value': row['_id'], 'label': row.get('label') or row['_id'], 'count': row['count']}
+            for row in raw.get('cities', []) if row['_id']
+        ],
+        'space_types': [
+            {'value': row['_id'], 'count': row['count']} for row in raw.get('space_types', []) if row['_id']
+        ],
+        'amenities': [
+            {'value': row['_id'], 'count': row['count']} for row in raw.get('amenities', []) if row['_id']
+        ],
+        'price_buckets': [
+            # max inclusive, karon max_price filter $lte kore.
+            {'min': low, 'max': high - 1 if high else None, 'count': buckets.get(low, 0)}
+            for low, high in zip(bounds, bounds[1:])
+        ],
+        'coworking': {'yes': coworking.get(True, 0), 'no': coworking.get(False, 0)},
+    }
+
+
+def get_space_facets(filters):
+    """
+    Filter sidebar er count: city, space type, amenity, price bucket ar coworking
+    yes/no, ekta $facet aggregation e. Sort/cursor chara filter signature onujayi
+    search cache e rakha hoy, tai page bodlale abar gona hoy na.
+    """
+    facet_filters = {key: value for key, value in filters.items() if key != 'sort_by'}
+    key = json.dumps(['facets', _canonical_filters(facet_filters)], sort_keys=True, default=str)
+    hit, facets = space_search_cache.get(key)
+    if hit:
+        return facets
+
+    query = build_space_query(facet_filters)
+    pipeline = _facet_pipeline(query)
+    query_advisor.record_pipeline("space_facets", spaces_collection, pipeline, pipeline[0]['$match'])
+    raw = next(spaces_collection.aggregate(pipeline), {})
+    facets = _shape_facets(raw)
+    space_search_cache.set(key, facets, _search_cache_partitions(facet_filters))
+    return facets
+
+
+# --- Best match scoring ---
+
+# Sort specs for computed scores; '_id' breaks ties like the other sorts.
+BEST_MATCH_SORT_SPEC = [('match_score', DESCENDING), ('_id', ASCENDING)]
+RELEVANCE_SORT_SPEC = [('text_score', DESCENDING), ('_id', ASCENDING)]
+DISTANCE_SORT_SPEC = [('distance_m', ASCENDING), ('_id', ASCENDING)]
+
+# Keyword search er text score ke best_match score e koto gun kore jog kora hobe.
+TEXT_SCORE_WEIGHT = 10
+
+# 'looking_for' text e ei shobdo gulo thakle oi space type/amenity prefer kora hoy.
+LOOKING_FOR_SPACE_TYPES = {
+    'apartment': 'Full Apartment',
+    'private': 'Private Room',
+    'shared': 'Shared Room',
+}
+LOOKING_FOR_AMENITIES = {
+    'wifi': 'High-Speed WiFi',
+    'ac': 'AC',
+    'kitchen': 'Kitchen',
+    'parking': 'Parking',
+    'pool': 'Pool',
+}
+
+
+# Profile er je field gulo best_match score e use hoy (search cache key er jonno).
+BEST_MATCH_PROFILE_FIELDS = ('max_budget', 'min_wifi_speed', 'looking_for')
+
+
+def _looking_for_words(user_profile):
+    return re.findall(r"[\w']+", (user_profile.get('looking_for') or '').casefold())
+
+
+def _budget_rule(user_profile, filters):
+    # Budget match
+    return [{'$cond': [{'$lte': ['$price_per_night', user_profile.get('max_budget', 99999)]}, 20, 0]}]
+
+
+def _wifi_rule(user_profile, filters):
+    # Wifi speed match
+    return [{'$cond': [
+        {'$gte': [{'$ifNull': ['$wifi_speed_mbps', 0]}, user_profile.get('min_wifi_speed', 0)]}, 15, 0
+    ]}]
+
+
+def _looking_for_rule(user_profile, filters):
+    """
+    'looking_for' (jemon "A quiet space in Dhaka with a kitchen") theke city,
+    space type ebong amenity preference mile gele extra score.
+    """
+    words = _looking_for_words(user_profile)
+    if not words:
+        return []
+    # City name ek ba dui shobder hote pare (jemon "cox's bazar"), tai 1- ebong 2-word phrase.
+    phrases = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+    expressions = [{'$cond': [{'$in': ['$city_key', phrases]}, 10, 0]}]
+
+    space_types = sorted({LOOKING_FOR_SPACE_TYPES[w] for w in words if w in LOOKING_FOR_SPACE_TYPES})
+    if space_types:
+        expressions.append({'$cond': [{'$in': ['$space_type', space_types]}, 5, 0]})
+
+    for amenity in sorted({LOOKING_FOR_AMENITIES[w] for w in words if w in LOOKING_FOR_AMENITIES}):
+        expressions.append({'$cond': [{'$in': [amenity, {'$ifNull': ['$amenities', []]}]}, 3, 0]})
+
+    if 'coworking' in words:
+        expressions.append({'$cond': [{'$eq': ['$has_coworking_space', True]}, 5, 0]})
+    return expressions
+
+
+def _text_rule(user_profile, filters):
+    # Keyword search hole text relevance o best match e gona hoy.
+    if not (filters.get('q') or '').strip():
+        return []
+    return [{'$multiply': [{'$meta': 'textScore'}, TEXT_SCORE_WEIGHT]}]
+
+
+# Prottek rule (user profile, filters) theke kichu aggregation expression return kore, jeguloke
+# jog kore match_score hoy. Notun preference er jonno ekta rule function add korlei hobe.
+BEST_MATCH_RULES = [_budget_rule, _wifi_rule, _looking_for_rule, _text_rule]
+
+
+def best_match_score_expr(user_profile, filters=None):
+    """User profile er jonno '$addFields' e use korar score expression toiri kore."""
+    expressions = []
+    for rule in BEST_MATCH_RULES:
+        expressions.extend(rule(user_profile, filters or {}))
+    return {'$add': expressions} if expressions else 0
+
+
+def _filter_spaces_ranked(name, query, head_stages, sort_spec, cursor_name, position, page_size, projection=None):
+    """
+    Computed score diye sort (best match, relevance, distance). head_stages filter kore
+    ebong sort_spec er prothom field (score) ta toiri kore; tarpor $sort -> $limit, tai
+    shudhu top (page_size + 1) ta space database theke ashe. Projection shesh e $project hoy.
+    """
+    backwards = position is not None and position[0] == 'before'
+    pipeline = list(head_stages)
+    if position:
+        pipeline.append({'$match': _keyset_clause(sort_spec, position[1], backwards)})
+    pipeline.append({'$sort': {
+        field: -direction if backwards else direction for field, direction in sort_spec
+    }})
+    pipeline.append({'$limit': page_size + 1})
+    projection = _projection_with_fields(projection, [field for field, _ in sort_spec])
+    if projection:
+        pipeline.append(_project_stage(projection))
+
+    query_advisor.record_pipeline(name, spaces_collection, pipeline, query)
+    items = list(spaces_collection.aggregate(pipeline))
+    return _build_page(
+        items, cursor_name, lambda s: _sort_key_values(s, sort_spec), page_size,
+        position[0] if position else None
+    )
+
+# Materialized, time-decayed popularity (see models/popularity.py), highest first.
+POPULARITY_SORT_SPEC = [("popularity_score", DESCENDING), ("_id", ASCENDING)]
+
+
+def get_popular_spaces_in_location(location, limit=4, exclude_id=None, projection=None):
+    """
+    Finds the most popular other spaces in the same location, excluding the current one.
+    Uses the (city_key, popularity_score, _id) index; with projection={'_id': 1} the
+    query is answered from the index alone.
+    """
+    query = {"city_key": normalize_city(location)}
     if exclude_id:
         query["_id"] = {"$ne": ObjectId(exclude_id)}
-    # Popularity can be defined by reviews, bookings, etc.
-    # For now, we'll just get other spaces from the same location.
-    return list(spaces_collection.find(query).limit(limit))
+    cursor = spaces_collection.find(query, resolve_projection(projection)).sort(POPULARITY_SORT_SPEC).limit(limit)
+    query_advisor.record("popular_spaces", cursor, query, POPULARITY_SORT_SPEC)
+    return list(cursor)
 
 
 # --- Sample data utilities ---
@@ -256,11 +1128,63 @@ def add_sample_spaces():
             for key in ["host_name", "host_email", "host_phone", "host_nid"]:
                 if key in space:
                     del space[key]
+            space["city_key"] = normalize_city(space["location_city"])
+            space["location"] = geo_point(space["latitude"], space["longitude"])
+            space["rating_summary"] = empty_rating_summary()
 
         spaces_collection.insert_many(sample_data)
+        clear_space_cache()
         print(f"{len(sample_data)} sample spaces added.")
 
 
+def backfill_city_keys():
+    """
+    Migration: jeshob space er 'city_key' nei ba location_city er shathe mele na,
+    shegulo te normalized city_key likhe dey. Returns the number of spaces updated.
+    """
+    operations = []
+    for space in spaces_collection.find({}, {"location_city": 1, "city_key": 1}):
+        city_key = normalize_city(space.get("location_city"))
+        if space.get("city_key") != city_key:
+            operations.append(UpdateOne({"_id": space["_id"]}, {"$set": {"city_key": city_key}}))
+    if operations:
+        spaces_collection.bulk_write(operations, ordered=False)
+        clear_space_cache()
+    return len(operations)
+
+
+def backfill_geo_locations():
+    """
+    Migration: latitude/longitude theke GeoJSON 'location' field likhe dey jeshob
+    space e sheta nei ba purono. Returns the number of spaces updated.
+    """
+    operations = []
+    for space in spaces_collection.find({}, {"latitude": 1, "longitude": 1, "location": 1}):
+        location = geo_point(space.get("latitude"), space.get("longitude"))
+        if location and space.get("location") != location:
+            operations.append(UpdateOne({"_id": space["_id"]}, {"$set": {"location": location}}))
+    if operations:
+        spaces_collection.bulk_write(operations, ordered=False)
+        clear_space_cache()
+    return len(operations)
+
+
+def normalize_photo_paths():
+    """
+    Migration: purono photo path gulo (jemon 'static/uploads/x.jpg', backslash,
+    absolute path) canonical 'uploads/x.jpg' form e likhe dey. Returns the number of spaces updated.
+    """
+    operations = []
+    for space in spaces_collection.find({"photos": {"$exists": True}}, {"photos": 1}):
+        photos = canonical_photos(space.get("photos"))
+        if space.get("photos") != photos:
+            operations.append(UpdateOne({"_id": space["_id"]}, {"$set": {"photos": photos}}))
+    if operations:
+        spaces_collection.bulk_write(operations, ordered=False)
+        clear_space_cache()
+    return len(operations)
+
+
 def reset_sample_data():
     """Deletes and re-inserts sample data for testing."""
     deleted = spaces_collection.delete_many({}).deleted_count
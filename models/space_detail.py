@@ -0,0 +1,79 @@
+# models/space_detail.py
+# Space detail page/API er jonno loader: space, rating summary, review er prothom
+# page ebong host er basic info ekta aggregation e ($lookup diye) ana hoy, tai
+# detail dekhate database e ekbar e jete hoy.
+
+from bson.objectid import ObjectId
+
+from .space import spaces_collection, PROJECTIONS
+from .review import (
+    REVIEW_PAGE_SIZE,
+    build_review_page,
+    get_space_rating,
+)
+from . import query_advisor
+
+# Host er je field gulo detail page e dekhano hoy (password, NID, phone na).
+HOST_PUBLIC_FIELDS = {"first_name": 1, "last_name": 1, "is_verified": 1, "profile_picture_url": 1, "created_at": 1}
+
+
+def _detail_pipeline(space_obj_id, review_limit):
+    return [
+        {"$match": {"_id": space_obj_id}},
+        # Internal field (occupied, popularity_score) response e jay na.
+        {"$project": PROJECTIONS["detail"]},
+        # Review gulo (space_id, created_at) index diye notun theke purono, shudhu prothom page.
+        {"$lookup": {
+            "from": "reviews",
+            "let": {"space_id": "$_id"},
+            "pipeline": [
+                {"$match": {"$expr": {"$eq": ["$space_id", "$$space_id"]}}},
+                {"$sort": {"created_at": -1, "_id": -1}},
+                {"$limit": review_limit + 1},
+            ],
+            "as": "reviews",
+        }},
+        # host_id string hishebe thake; invalid hole host null thake.
+        {"$lookup": {
+            "from": "users",
+            "let": {"host_id": {"$convert": {"input": "$host_id", "to": "objectId", "onError": None, "onNull": None}}},
+            "pipeline": [
+                {"$match": {"$expr": {"$eq": ["$_id", "$$host_id"]}}},
+                {"$project": HOST_PUBLIC_FIELDS},
+            ],
+            "as": "host",
+        }},
+    ]
+
+
+def get_space_detail(space_id, review_limit=REVIEW_PAGE_SIZE):
+    """
+    Ekta space er detail ekta round trip e. Space na thakle None return kore.
+
+    Returns {'space', 'average_rating', 'review_count', 'rating_histogram',
+    'reviews' (prothom page), 'reviews_next_cursor', 'host'}.
+    Porer review page gulo models.review.get_space_reviews_page diye ashe.
+    """
+    try:
+        space_obj_id = ObjectId(space_id)
+    except Exception:
+        return None
+    pipeline = _detail_pipeline(space_obj_id, review_limit)
+    query_advisor.record_pipeline("space_detail", spaces_collection, pipeline, pipeline[0]["$match"])
+    space = next(spaces_collection.aggregate(pipeline), None)
+    if not space:
+        return None
+
+    reviews = build_review_page(space.pop("reviews", []), review_limit, f"reviews:{space_id}")
+    hosts = space.pop("host", [])
+    # Purono document e rating_summary na thakle get_space_rating reviews theke hishab kore.
+    average_rating, review_count = get_space_rating(space)
+    return {
+        "space": space,
+        "average_rating": average_rating,
+        "review_count": review_count,
+        "rating_histogram": (space.get("rating_summary") or {}).get("histogram", {}),
+        "reviews": reviews["reviews"],
+        "reviews_next_cursor": reviews["next_cursor"],
+        "host": hosts[0] if hosts else None,
+    }
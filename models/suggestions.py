@@ -0,0 +1,149 @@
+# models/suggestions.py
+# "Popular spots nearby" suggestion request path er baire hishab hoy. Booking ba
+# favorite add/remove hole enqueue_suggestions call kora hoy; background worker
+# (ThreadPoolExecutor) oi space er city er popular space gulo ber kore user er
+# jonno 'suggestions' collection e rakhe. /suggestions shudhu oi result pore.
+#
+# SUGGESTION_QUEUE=mongo hole job gulo age 'suggestion_jobs' collection e likha hoy,
+# tai process restart holeo pending job harabe na (app start e abar chalano hoy).
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from bson.objectid import ObjectId
+from pymongo import ASCENDING, ReturnDocument
+
+from .user import db
+from .space import spaces_collection, get_popular_spaces_in_location, resolve_projection
+
+SUGGESTION_LIMIT = 4
+SUGGESTION_WORKERS = int(os.getenv("SUGGESTION_WORKERS", "2"))
+DURABLE_QUEUE = os.getenv("SUGGESTION_QUEUE", "").lower() == "mongo"
+# Worker crash korle 'running' job ei shomoy por abar pending dhora hoy.
+JOB_LEASE = timedelta(minutes=5)
+
+# {_id: user_id, space_ids, location_city, source_space_id, computed_at}
+suggestions_collection = db.suggestions
+# {user_id, space_id, status: 'pending' | 'running', created_at, claimed_at}
+suggestion_jobs_collection = db.suggestion_jobs
+
+_executor = ThreadPoolExecutor(max_workers=SUGGESTION_WORKERS, thread_name_prefix="suggestions")
+
+
+def ensure_suggestion_indexes():
+    """Durable queue er claim query (status, created_at) er index."""
+    return [suggestion_jobs_collection.create_index([("status", ASCENDING), ("created_at", ASCENDING)])]
+
+
+def compute_suggestions(user_id, space_id):
+    """
+    space_id er city te onno popular space gulo ber kore user er suggestion hishebe save kore.
+    Space na thakle kichu kore na. Returns the suggested space ids.
+    """
+    space = spaces_collection.find_one({"_id": ObjectId(space_id)}, {"location_city": 1})
+    if not space:
+        return []
+    spaces = get_popular_spaces_in_location(
+        space.get("location_city"), limit=SUGGESTION_LIMIT, exclude_id=space_id, projection={"_id": 1}
+    )
+    space_ids = [s["_id"] for s in spaces]
+    suggestions_collection.update_one(
+        {"_id": str(user_id)},
+        {"$set": {
+            "space_ids": space_ids,
+            "location_city": space.get("location_city"),
+            "source_space_id": str(space_id),
+            "computed_at": datetime.utcnow(),
+        }},
+        upsert=True
+    )
+    return space_ids
+
+
+def _run(user_id, space_id):
+    # Background thread e exception kothao dekha jay na, tai print kora hocche.
+    try:
+        compute_suggestions(user_id, space_id)
+    except Exception as e:
+        print(f"Suggestions: could not compute for user {user_id}: {e}")
+
+
+def _claim_job():
+    """Shobcheye purono pending (ba lease expired running) job ta 'running' kore return kore."""
+    now = datetime.utcnow()
+    return suggestion_jobs_collection.find_one_and_update(
+        {"$or": [
+            {"status": "pending"},
+            {"status": "running", "claimed_at": {"$lt": now - JOB_LEASE}},
+        ]},
+        {"$set": {"status": "running", "claimed_at": now}},
+        sort=[("created_at", ASCENDING)],
+        return_document=ReturnDocument.AFTER
+    )
+
+
+def drain_suggestion_jobs():
+    """Durable queue te jotokkhon job ache, ekta ekta kore chalay. Returns the number of jobs run."""
+    done = 0
+    while True:
+        job = _claim_job()
+        if not job:
+            return done
+        _run(job["user_id"], job["space_id"])
+        suggestion_jobs_collection.delete_one({"_id": job["_id"]})
+        done += 1
+
+
+def enqueue_suggestions(user_id, space_id):
+    """
+    User er suggestion abar hishab korar job queue e dey ebong shathe shathe return kore;
+    hishab ta background thread e hoy.
+    """
+    if DURABLE_QUEUE:
+        suggestion_jobs_collection.insert_one({
+            "user_id": str(user_id),
+            "space_id": str(space_id),
+            "status": "pending",
+            "created_at": datetime.utcnow(),
+        })
+        return _executor.submit(drain_suggestion_jobs)
+    return _executor.submit(_run, str(user_id), str(space_id))
+
+
+def resume_suggestion_jobs():
+    """App start e durable queue te age theke thaka job gulo chalano shuru kore."""
+    if DURABLE_QUEUE:
+        ensure_suggestion_indexes()
+        return _executor.submit(drain_suggestion_jobs)
+    return None
+
+
+def get_user_suggestions(user_id, projection='card', computed_since=None):
+    """
+    User er precomputed suggestion space gulo, hishab korar order e. Ekhono hishab na
+    hoye thakle empty list. computed_since deya thakle ar suggestion tar age hishab hoye
+    thakle (queue er job ekhono shesh hoy ni) None return kore.
+    """
+    doc = suggestions_collection.find_one({"_id": str(user_id)}, {"space_ids": 1, "computed_at": 1})
+    if computed_since and (not doc or doc.get("computed_at", datetime.min) < computed_since):
+        return None
+    if not doc or not doc.get("space_ids"):
+        return []
+    spaces = {
+        space["_id"]: space
+        for space in spaces_collection.find({"_id": {"$in": doc["space_ids"]}}, resolve_projection(projection))
+    }
+    return [spaces[space_id] for space_id in doc["space_ids"] if space_id in spaces]
+
+
+def get_queued_suggestions(user_id, queued_at, projection='card'):
+    """
+    queued_at (enqueue er shomoy, ISO string) er porer job er result. Job ekhono shesh na
+    hole None, tai purono (onno city er) suggestion dekhano hoy na. JOB_LEASE er beshi
+    deri hole (job ta harano, ba space delete hoyeche) ja ache tai return kore.
+    """
+    since = datetime.fromisoformat(queued_at) if isinstance(queued_at, str) else None
+    if since and datetime.utcnow() - since > JOB_LEASE:
+        since = None
+    return get_user_suggestions(user_id, projection, computed_since=since)
@@ -0,0 +1,76 @@
+# models/traveler_profile_page.py
+# Traveler profile page er loader: user document ekbar e pora hoy (profile, favorites
+# er id list ar emergency contacts oi document ei thake), tarpor baki independent
+# read gulo (favorite spaces, reviews, bookings) ekta bounded thread pool e eksathe chole.
+# Prottek section koto shomoy nilo sheta 'timings' e ashe, jate bujha jay kon panel slow.
+
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .traveler_profile import db, get_user_profile
+from .favorites import get_favorite_spaces_by_ids
+from .review import get_reviews_by_user
+
+logger = logging.getLogger(__name__)
+
+# Shob request mile ei koyta thread er beshi use hoy na; pool bhora thakle section gulo queue e wait kore.
+PROFILE_LOADER_WORKERS = int(os.getenv("PROFILE_LOADER_WORKERS", "4"))
+
+_executor = ThreadPoolExecutor(max_workers=PROFILE_LOADER_WORKERS, thread_name_prefix="profile-loader")
+
+
+def _timed(loader, *args, **kwargs):
+    """loader ke chalay ebong (result, milliseconds) return kore."""
+    started = time.perf_counter()
+    result = loader(*args, **kwargs)
+    return result, (time.perf_counter() - started) * 1000
+
+
+def _get_booking_history(user_obj_id):
+    # Bookings e user_id string hishebe save thake.
+    return list(db.bookings.find({'user_id': str(user_obj_id)}))
+
+
+def load_traveler_profile(user_obj_id, reviews_cursor=None):
+    """
+    Traveler profile page er shob data. User na thakle None return kore.
+
+    Returns {'profile', 'favorites', 'reviews', 'reviews_next_cursor', 'history',
+    'contacts', 'timings'}; 'timings' e prottek section er milliseconds ({'profile',
+    'favorites', 'reviews', 'bookings', 'total'}).
+    """
+    started = time.perf_counter()
+    profile, profile_ms = _timed(get_user_profile, user_obj_id)
+    if not profile:
+        return None
+
+    sections = {
+        'favorites': _executor.submit(_timed, get_favorite_spaces_by_ids, profile.get('favorites', []), 'card'),
+        'reviews': _executor.submit(_timed, get_reviews_by_user, user_obj_id, reviews_cursor),
+        'bookings': _executor.submit(_timed, _get_booking_history, user_obj_id),
+    }
+    results = {}
+    timings = {'profile': profile_ms}
+    for name, future in sections.items():
+        results[name], timings[name] = future.result()
+    timings['total'] = (time.perf_counter() - started) * 1000
+    logger.debug("Traveler profile %s loaded: %s", user_obj_id,
+                 ", ".join(f"{name}={ms:.1f}ms" for name, ms in timings.items()))
+
+    return {
+        'profile': profile,
+        'favorites': results['favorites'],
+        'reviews': results['reviews']['reviews'],
+        'reviews_next_cursor': results['reviews']['next_cursor'],
+        'history': results['bookings'],
+        # Emergency contacts user document ei thake, alada read lage na.
+        'contacts': profile.get('emergency_contacts', []),
+        'timings': timings,
+    }
+
+
+def server_timing_header(timings):
+    """timings dict theke 'Server-Timing' response header er value banay (browser devtools e dekha jay)."""
+    return ", ".join(f"{name};dur={ms:.1f}" for name, ms in timings.items())
@@ -1,9 +1,11 @@
 # routes\admin.py
 
 import os
-from flask import Blueprint, render_template, request, redirect, url_for, flash, session
+from flask import Blueprint, render_template, request, redirect, url_for, flash, session, jsonify
 from bson.objectid import ObjectId
 from models.user import db
+from models.space import get_search_cache_stats
+from models.map_clusters import get_cluster_cache_stats
 
 admin_bp = Blueprint("admin_bp", __name__, url_prefix="/admin")
 
@@ -36,4 +38,14 @@ def dashboard():
         }))
     if 'user_id' in session:
         dashboard_data['user'] = db.users.find_one({'_id': ObjectId(session['user_id'])})
-    return render_template('dashboard.html', **dashboard_data)
\ No newline at end of file
+    return render_template('dashboard.html', **dashboard_data)
+
+@admin_bp.route('/cache-stats')
+def cache_stats():
+    """Space search ebong map cluster cache er hit/miss/eviction counter JSON e dey (shudhu admin)."""
+    if session.get('role') != 'admin':
+        return jsonify({"error": "Admin access required"}), 403
+    return jsonify({
+        "space_search": get_search_cache_stats(),
+        "map_clusters": get_cluster_cache_stats(),
+    })
@@ -2,60 +2,118 @@
 # Ei file ta shudhu data pathanor jonno toiri, kono HTML page dekhabe na.
 # Ekhankar route gulo aamra JavaScript (AJAX/Fetch) theke call korbo JSON format e data pawar jonno.
 
-from flask import Blueprint, jsonify
+import json
+from flask import Blueprint, jsonify, request, Response
 from bson.objectid import ObjectId
+from pymongo.errors import OperationFailure
 from datetime import datetime
 # Model theke proyojonio function gulo import kora hocche.
-from models.space import get_space_by_id
-from models.review import get_reviews_for_space, get_average_rating_for_space
+from models.space import filter_spaces, parse_geo_filters, DEFAULT_PAGE_SIZE
+from models.review import get_space_reviews_page
+from models.space_detail import get_space_detail
+from models.map_clusters import get_map_clusters
 
 # '/api' prefix diye ekta notun Blueprint toiri kora hocche.
 api_bp = Blueprint('api', __name__, url_prefix='/api')
 
-def sanitize_for_json(data):
+def json_default(value):
     """
-    Recursively traverses a data structure (dict or list) and converts
-    any BSON types (like ObjectId and datetime) to JSON-serializable formats.
+    json.dumps er default hook: ObjectId ar datetime ke string e convert kore.
+    Puro data copy kore na, serialize korar shomoy convert hoy.
     """
-    if isinstance(data, list):
-        return [sanitize_for_json(item) for item in data]
-    if isinstance(data, dict):
-        return {key: sanitize_for_json(value) for key, value in data.items()}
-    if isinstance(data, ObjectId):
-        return str(data)
-    if isinstance(data, datetime):
-        return data.isoformat()
-    return data
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+def json_response(data, status=200):
+    """BSON type shoho data ke sorasori JSON response e serialize kore."""
+    return Response(json.dumps(data, default=json_default), status=status, mimetype='application/json')
 
 # '/api/space/<space_id>' URL er jonno ei function ta kaaj korbe.
 @api_bp.route('/space/<space_id>')
 def space_details(space_id):
     """
-    Ekta nirdishto space er shob details, rating, ebong review JSON format e return kore.
+    Ekta nirdishto space er details, rating, host info ebong review er prothom page JSON format e return kore.
+    Porer review gulo '/api/space/<space_id>/reviews?cursor=...' theke ashe.
     """
     try:
-        # Model theke space er details fetch kora hocche.
-        space = get_space_by_id(space_id)
-        if not space:
+        # Space, rating, review ar host ekta aggregation e ana hocche.
+        detail = get_space_detail(space_id)
+        if not detail:
             # Jodi space na paowa jay, tahole 404 error pathano hocche.
             return jsonify({"error": "Space not found"}), 404
-
-        # Oi space er shob review ebong average rating fetch kora hocche.
-        reviews = get_reviews_for_space(space_id)
-        avg_rating, review_count = get_average_rating_for_space(space_id)
-
-        # CORRECTED: Use the robust sanitization function to clean all data
-        clean_space = sanitize_for_json(space)
-        clean_reviews = sanitize_for_json(reviews)
-
-        # Shob data ekta dictionary te shajiye JSON hishebe pathano hocche.
-        return jsonify({
-            "space": clean_space,
-            "reviews": clean_reviews,
-            "average_rating": avg_rating,
-            "review_count": review_count
-        })
+        return json_response(detail)
     except Exception as e:
         # Jodi kono error hoy, tahole 500 server error pathano hocche.
         return jsonify({"error": str(e)}), 500
 
+# '/api/space/<space_id>/reviews' URL er jonno ei function ta kaaj korbe.
+@api_bp.route('/space/<space_id>/reviews')
+def space_reviews(space_id):
+    """Ekta space er review er porer page (detail response er 'reviews_next_cursor' diye)."""
+    try:
+        page = get_space_reviews_page(space_id, cursor=request.args.get('cursor'))
+    except Exception:
+        return jsonify({"error": "Space not found"}), 404
+    return json_response(page)
+
+# '/api/spaces/near' URL er jonno ei function ta kaaj korbe.
+@api_bp.route('/spaces/near')
+def spaces_near():
+    """
+    Ekta point er ashe pashe (lat, lng, radius_km) ba map er bounding box
+    (bbox=minLng,minLat,maxLng,maxLat) er moddhe space gulo kache theke dure sort kore dey.
+    Baki /spaces filter (min_price, space_type, amenities, ...) o deya jay.
+    """
+    filters = {
+        'lat': request.args.get('lat', ''),
+        'lng': request.args.get('lng', ''),
+        'radius_km': request.args.get('radius_km', ''),
+        'bbox': request.args.get('bbox', ''),
+        'min_price': request.args.get('min_price', ''),
+        'max_price': request.args.get('max_price', ''),
+        'coworking': request.args.get('coworking', ''),
+        'space_type': request.args.get('space_type', ''),
+        'amenities': request.args.getlist('amenities'),
+        'sort_by': 'distance'
+    }
+    if not parse_geo_filters(filters):
+        return jsonify({"error": "Provide lat and lng (optionally radius_km) or bbox=minLng,minLat,maxLng,maxLat"}), 400
+
+    try:
+        page_size = min(max(int(request.args.get('limit', DEFAULT_PAGE_SIZE)), 1), 100)
+    except (ValueError, TypeError):
+        page_size = DEFAULT_PAGE_SIZE
+
+    try:
+        page = filter_spaces(filters, cursor=request.args.get('cursor'), page_size=page_size)
+    except OperationFailure as e:
+        # MongoDB geo shape ta mane na (jemon puro prithibi jora bbox).
+        return jsonify({"error": f"Invalid geo query: {e}"}), 400
+    return json_response(page)
+
+# '/api/spaces/clusters' URL er jonno ei function ta kaaj korbe.
+@api_bp.route('/spaces/clusters')
+def spaces_clusters():
+    """
+    Map viewport (bbox=minLng,minLat,maxLng,maxLat) ebong zoom er jonno marker cluster dey:
+    prottek cluster e count, centroid (lat, lng) ar price range thake. Beshi zoom e
+    individual space point dey. /spaces er filter (location, min_price, ...) o deya jay.
+    """
+    filters = {
+        'location': request.args.get('location', ''),
+        'min_price': request.args.get('min_price', ''),
+        'max_price': request.args.get('max_price', ''),
+        'coworking': request.args.get('coworking', ''),
+        'space_type': request.args.get('space_type', ''),
+        'amenities': request.args.getlist('amenities'),
+    }
+    try:
+        result = get_map_clusters(filters, request.args.get('bbox'), request.args.get('zoom'))
+    except OperationFailure as e:
+        return jsonify({"error": f"Invalid geo query: {e}"}), 400
+    if result is None:
+        return jsonify({"error": "Provide bbox=minLng,minLat,maxLng,maxLat and an integer zoom"}), 400
+    return jsonify(result)
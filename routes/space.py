@@ -1,8 +1,12 @@
 # routes\space.py
 
-from flask import Blueprint, request, jsonify, render_template, session, redirect, url_for, flash
+from flask import (
+    Blueprint, request, jsonify, render_template, session, redirect, url_for, flash,
+    Response, stream_with_context
+)
 from werkzeug.utils import secure_filename
 import os
+import json
 import uuid
 from datetime import datetime
 from bson.objectid import ObjectId
@@ -13,12 +17,19 @@ from models.space import (
     get_space_by_id, 
     update_space, 
     filter_spaces,
-    get_all_spaces,
-    get_popular_spaces_in_location,
-    delete_space
+    delete_space,
+    get_spaces_page,
+    iter_spaces,
+    parse_fields,
+    resolve_projection,
+    DEFAULT_PAGE_SIZE
 )
-from models.review import get_average_rating_for_space
-from models.user import db
+from models.review import attach_ratings
+from models.space_detail import get_space_detail
+from models.booking import create_booking, BOOKED, DATES_UNAVAILABLE, INVALID_DATES, KEY_REUSED
+from models.suggestions import enqueue_suggestions
+from routes.space_filters import page_url
+from routes.api import json_default, json_response
 
 # Initialize the Blueprint
 space_bp = Blueprint('space_bp', __name__)
@@ -47,85 +58,23 @@ def _normalize_incoming_id(val):
             return v
     return v
 
-def _sanitize_for_session(data):
-    """
-    Recursively sanitizes data to be JSON-serializable for the session.
-    """
-    if isinstance(data, list):
-        return [_sanitize_for_session(item) for item in data]
-    if isinstance(data, dict):
-        # Use .copy() to avoid modifying the original dictionary in place
-        clean_dict = {}
-        for key, value in data.items():
-            # Convert ObjectId to string for the '_id' field specifically
-            if key == '_id' and isinstance(value, ObjectId):
-                clean_dict[key] = str(value)
-            else:
-                clean_dict[key] = _sanitize_for_session(value)
-        return clean_dict
-    if isinstance(data, ObjectId):
-        return str(data)
-    if isinstance(data, datetime):
-        return data.isoformat()
-    return data
-
-def _unwrap_and_normalize_space_obj(raw):
-    """
-    Accept space dicts in variants (wrapped under 'space' key or direct).
-    Ensures:
-      - '_id' is a string
-      - 'photos' paths are normalized for url_for('static', filename=...)
-      - 'space_title' exists
-    """
-    if not isinstance(raw, dict):
-        return raw
-    # Use .copy() to avoid modifying the original dictionary in place
-    s = raw.get('space').copy() if 'space' in raw and isinstance(raw['space'], dict) else raw.copy()
-
-    # Carry top-level metadata if the object was wrapped
-    for k in ('average_rating', 'review_count', 'reviews'):
-        if k in raw and k not in s:
-            s[k] = raw[k]
-
-    # Normalize the '_id' field to a string
-    if s.get('_id') is not None:
-        s['_id'] = str(s['_id'])
-
-    # Normalize photo paths for consistency
-    photos = s.get('photos') or []
-    normalized = []
-    for p in photos:
-        if not p:
-            continue
-        p2 = p.replace("\\", "/")
-        if p2.startswith("static/"):
-            p2 = p2[len("static/"):]
-        if os.path.isabs(p2) or (':' in p2 and '/' in p2):
-            p2 = os.path.basename(p2)
-            p2 = f"uploads/{p2}"
-        if not p2.startswith("uploads/") and '/' not in p2:
-            p2 = f"uploads/{p2}"
-        normalized.append(p2)
-    s['photos'] = normalized
-
-    # Ensure a title field exists
-    s.setdefault('space_title', s.get('space_title') or s.get('title') or s.get('name') or '')
-    return s
-
 # --- Route Definitions ---
 
 @space_bp.route('/space/<space_id>')
 def space_detail(space_id):
     """Displays the full detail page for a single space."""
-    space = get_space_by_id(space_id)
-    if not space:
+    # Space, rating, prothom page er review ebong host ekta aggregation e ana hocche.
+    detail = get_space_detail(space_id)
+    if not detail:
         flash("Space not found.", "danger")
         return redirect(url_for('space_filters.view_spaces'))
     
+    space = detail['space']
     # Ensure ObjectId is converted to string for template compatibility
     space['_id'] = str(space['_id'])
     
-    return render_template('space_detail.html', space=space)
+    # Booking form er idempotency key: double click ba retry te ekta i booking hoy.
+    return render_template('space_detail.html', space=space, detail=detail, idempotency_key=str(uuid.uuid4()))
 
 
 @space_bp.route('/spaces/create', methods=['GET', 'POST'])
@@ -218,14 +167,27 @@ def book_space(space_id):
     }
 
     try:
-        # FIX: Added the missing line to insert the booking into the database
-        db.bookings.insert_one(booking_record)
-        
+        # Overlap check ar insert space er lock dhore eksathe hoy (double booking hoy na).
+        # Same key abar ashle (double click, proxy retry) prothom submission er result i ashe.
+        idempotency_key = request.form.get('idempotency_key') or request.headers.get('Idempotency-Key')
+        status, booking_record = create_booking(booking_record, idempotency_key=idempotency_key)
+        if status != BOOKED:
+            if status == INVALID_DATES:
+                flash("Check-out date must be after the check-in date.", "danger")
+            elif status == DATES_UNAVAILABLE:
+                flash("Sorry, this space is already booked for some of those dates.", "danger")
+            elif status == KEY_REUSED:
+                flash("This booking form was already submitted for different dates. Please submit the form again.", "danger")
+            else:
+                flash("This space is being booked by someone else right now. Please try again.", "warning")
+            return redirect(url_for('space_bp.space_detail', space_id=space_id))
+
         flash(f"Successfully booked {space['space_title']}!", "success")
         
-        suggestions = get_popular_spaces_in_location(space['location_city'], exclude_id=space_id)
-        # FIX: Sanitize suggestions before saving to session
-        session['suggested_spaces'] = _sanitize_for_session(suggestions)
+        # Suggestion background e hishab hoy; redirect er jonno wait kora hoy na.
+        # Queue er shomoy rakha hoy jate booking history notun result ashar age purono ta na dekhay.
+        session['booking_suggestions_queued_at'] = datetime.utcnow().isoformat()
+        enqueue_suggestions(session['user_id'], space_id)
         session['new_suggestions'] = True
 
         return redirect(url_for('traveler_profiles.booking_history'))
@@ -249,6 +211,7 @@ def get_my_spaces_route():
         'min_price': request.args.get('min_price', ''),
         'max_price': request.args.get('max_price', ''),
         'location': request.args.get('location', ''),
+        'q': request.args.get('q', ''),
         'coworking': request.args.get('coworking', ''),
         'space_type': request.args.get('space_type', ''),
         'amenities': request.args.getlist('amenities'),
@@ -257,21 +220,19 @@ def get_my_spaces_route():
     
     filters['host_id'] = host_id
     
-    my_spaces = filter_spaces(filters)
-    
-    for space in my_spaces:
-        avg_rating, review_count = get_average_rating_for_space(space['_id'])
-        space['average_rating'] = avg_rating
-        space['review_count'] = review_count
+    page = filter_spaces(filters, cursor=request.args.get('cursor'), with_facets=True, projection='card')
+    my_spaces = page['spaces']
     
-    all_amenities = ["High-Speed WiFi", "AC", "Kitchen", "Parking"]
+    attach_ratings(my_spaces)
     
     return render_template(
         "spaces.html", 
         spaces=my_spaces, 
         filters=filters, 
-        all_amenities=all_amenities, 
-        is_my_spaces_page=True
+        facets=page['facets'], 
+        is_my_spaces_page=True,
+        next_url=page_url(page['next_cursor']),
+        prev_url=page_url(page['prev_cursor'])
     )
 
 @space_bp.route('/spaces/edit/<space_id>', methods=['GET', 'POST'])
@@ -309,11 +270,39 @@ def edit_space(space_id):
 @space_bp.route("/api/spaces", methods=["GET"])
 def api_get_all_spaces():
     """
-    A simple API endpoint to fetch all spaces.
+    API endpoint to list spaces, newest first.
+
+    Query parameters:
+      - limit / cursor: page size (max 100) and the opaque cursor from the previous response
+      - fields: comma separated field names to return (e.g. space_title,price_per_night,photos)
+      - profile: a named projection instead of fields (card, map_point, export)
+      - format=ndjson: stream every space (after 'cursor', up to 'limit' if given) as one
+        JSON object per line instead of returning a page
     """
-    spaces_cursor = get_all_spaces()
-    spaces_list = [_unwrap_and_normalize_space_obj(space) for space in spaces_cursor]
-    return jsonify(spaces_list)
+    projection = parse_fields(request.args.get('fields')) or resolve_projection(request.args.get('profile'))
+    if request.args.get('fields') and projection is None:
+        return jsonify({"error": "fields must be a comma separated list of field names"}), 400
+    # Kono projection na dile 'detail' (puro document, internal field chhara).
+    projection = projection or resolve_projection('detail')
+    try:
+        limit = int(request.args.get('limit', 0))
+    except (ValueError, TypeError):
+        return jsonify({"error": "limit must be an integer"}), 400
+
+    if request.args.get('format') == 'ndjson':
+        spaces = iter_spaces(projection, cursor=request.args.get('cursor'), limit=max(limit, 0))
+
+        def generate():
+            for space in spaces:
+                yield json.dumps(space, default=json_default) + "\n"
+        return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+    page = get_spaces_page(
+        cursor=request.args.get('cursor'),
+        page_size=limit or DEFAULT_PAGE_SIZE,
+        projection=projection
+    )
+    return json_response(page)
 
 @space_bp.route('/spaces/delete/<space_id>', methods=['POST'])
 def delete_space_route(space_id):
@@ -1,23 +1,33 @@
 # routes\space_filters.py
 # Ei file ta shob space dekhano ebong filter korar page er jonno route handle kore.
 
-from flask import Blueprint, render_template, request, session
+from flask import Blueprint, abort, render_template, request, session, url_for
+from pymongo.errors import OperationFailure
 # Model theke proyojonio function gulo import kora hocche.
-from models.space import filter_spaces, add_sample_spaces
-from models.review import get_average_rating_for_space
+from models.space import filter_spaces
+from models.review import attach_ratings
 from models.favorites import get_user_favorite_ids
 from models.traveler_profile import get_user_profile
 
 # 'space_filters' name e ekta notun Blueprint toiri kora hocche.
 space_filters_bp = Blueprint('space_filters', __name__, template_folder='../templates')
 
+
+def page_url(cursor):
+    """
+    Current request er shob filter query parameter rekhe shudhu 'cursor' bodle
+    ekta URL toiri kore. Cursor None hole None return kore (link dekhano hobe na).
+    """
+    if not cursor:
+        return None
+    args = request.args.to_dict(flat=False)
+    args['cursor'] = cursor
+    return url_for(request.endpoint, **args)
+
+
 # '/spaces' URL er jonno ei function ta kaaj korbe, shudhu GET request handle korbe.
 @space_filters_bp.route('/spaces', methods=['GET'])
 def view_spaces():
-    # Demonstration er jonno database e kichu sample space add kora hocche.
-    # Ei function ta check kore jodi space na thake shudhu tokhoni add kore.
-    add_sample_spaces()
-    
     # Jodi user login kora thake, tar profile data fetch kora hocche 'best match' sorting er jonno.
     user_profile = None
     if 'user_id' in session:
@@ -29,30 +39,47 @@ def view_spaces():
         'min_price': request.args.get('min_price', ''),
         'max_price': request.args.get('max_price', ''),
         'location': request.args.get('location', ''),
+        'q': request.args.get('q', ''),
         'coworking': request.args.get('coworking', ''),
         'space_type': request.args.get('space_type', ''),
         'amenities': request.args.getlist('amenities'), # getlist use kora hoy multiple value pawar jonno (e.g., amenities=AC&amenities=WiFi)
+        # "Near me" search: browser er location (lat, lng) ar radius, ba map er bounding box.
+        'lat': request.args.get('lat', ''),
+        'lng': request.args.get('lng', ''),
+        'radius_km': request.args.get('radius_km', ''),
+        'bbox': request.args.get('bbox', ''),
+        # Ei date gulote free space (YYYY-MM-DD).
+        'check_in': request.args.get('check_in', ''),
+        'check_out': request.args.get('check_out', ''),
         'sort_by': request.args.get('sort_by', 'best_match')
     }
     
-    # Ei filter criteria gulo diye model er filter_spaces function call kore database theke space khuje ber kora hocche.
-    spaces = filter_spaces(filters, user_profile)
+    # Ei filter criteria gulo diye model er filter_spaces function call kore database theke ekta page space khuje ber kora hocche.
+    # Sidebar er count (facets) o ei shathe ana hocche.
+    try:
+        page = filter_spaces(
+            filters, user_profile, cursor=request.args.get('cursor'), with_facets=True, projection='card'
+        )
+    except OperationFailure:
+        # MongoDB bbox/near shape ta mane na (jemon puro prithibi jora bbox).
+        abort(400, description="The map area (bbox) could not be searched.")
+    spaces = page['spaces']
     
-    # Filter kora prottekta space er jonno average rating ber kora hocche.
-    for space in spaces:
-        # Rating hishab korar function call kora hocche.
-        avg_rating, review_count = get_average_rating_for_space(space['_id'])
-        # Space er dictionary te notun rating info add kora hocche.
-        space['average_rating'] = avg_rating
-        space['review_count'] = review_count
+    # Page er shob space er average rating ekta batched query te ber kore space e add kora hocche.
+    attach_ratings(spaces)
 
     # Current user er kon kon space favorite kora ache, shegular ID list ber kora hocche.
     favorite_ids = []
     if 'user_id' in session:
         favorite_ids = get_user_favorite_ids(session['user_id'])
 
-    # Filter form e dekhanor jonno shob possible amenities er ekta list toiri kora.
-    all_amenities = ["High-Speed WiFi", "AC", "Kitchen", "Parking"]
-    
     # 'spaces.html' template ta render kora hocche ebong shob proyojonio data (spaces, filters, etc.) pass kora hocche.
-    return render_template('spaces.html', spaces=spaces, filters=filters, all_amenities=all_amenities, favorites=favorite_ids)
+    return render_template(
+        'spaces.html',
+        spaces=spaces,
+        filters=filters,
+        facets=page['facets'],
+        favorites=favorite_ids,
+        next_url=page_url(page['next_cursor']),
+        prev_url=page_url(page['prev_cursor'])
+    )
@@ -1,6 +1,7 @@
 # routes\suggestions.py
 
 from flask import Blueprint, render_template, session, redirect, url_for, flash
+from models.suggestions import get_user_suggestions
 
 suggestions_bp = Blueprint('suggestions', __name__, template_folder='../templates')
 
@@ -13,8 +14,8 @@ def view_suggestions():
         flash('You must be logged in as a traveler to view suggestions.', 'danger')
         return redirect(url_for('auth.login'))
 
-    # Get the suggestions from the session without removing them
-    suggested_spaces = session.get('suggested_spaces', [])
+    # Precomputed suggestions (background worker e hishab kora), user er jonno
+    suggested_spaces = get_user_suggestions(session['user_id'])
 
     # After viewing, set the new_suggestions flag to false to stop the blinking
     session['new_suggestions'] = False
@@ -1,6 +1,6 @@
 import os
 import re
-from flask import Blueprint, current_app, request, redirect, url_for, flash, session, render_template, jsonify
+from flask import Blueprint, current_app, request, redirect, url_for, flash, session, render_template, jsonify, make_response
 from werkzeug.utils import secure_filename
 from bson.objectid import ObjectId
 
@@ -8,12 +8,12 @@ from bson.objectid import ObjectId
 # FIXED: Removed the non-existent 'cancel_booking_in_space' import
 from models.traveler_profile import (
     update_traveler_profile_info,
-    get_user_profile,
     get_emergency_contacts,
     update_emergency_contacts
 )
-from models.favorites import get_user_favorite_spaces
-from models.review import get_reviews_by_user
+from models.traveler_profile_page import load_traveler_profile, server_timing_header
+from models.booking import cancel_booking
+from models.suggestions import get_user_suggestions, get_queued_suggestions
 from models.user import db 
 
 # 'traveler_profiles' name e ekta Blueprint toiri kora hocche.
@@ -36,33 +36,31 @@ def view_traveler_profile():
 
     # Use the _id from session for reliable lookups
     user_mongo_id = session['user_id']
+    # User document ekbar pora hoy; favorites, reviews ar bookings eksathe load hoy.
     try:
-        profile_data = get_user_profile(user_mongo_id)
+        page = load_traveler_profile(user_mongo_id, reviews_cursor=request.args.get('reviews_cursor'))
     except Exception:
         flash('Could not find your profile data.', 'danger')
         return redirect(url_for('auth.logout'))
 
-    if not profile_data:
+    if not page:
         flash('Could not find your profile data.', 'danger')
         return redirect(url_for('auth.logout'))
-    
-
-    # FIX: Use the correct user_mongo_id for all data fetching
-    favorite_spaces = get_user_favorite_spaces(user_mongo_id)
-    my_reviews = get_reviews_by_user(user_mongo_id)
-    booking_history_data = list(db.bookings.find({'user_id': user_mongo_id}))
-    emergency_contacts_data = get_emergency_contacts(user_mongo_id)
 
 
     # 'traveler_profile.html' template ta shob data shoho render kora hocche.
-    return render_template(
+    response = make_response(render_template(
         'traveler_profile.html',
-        profile=profile_data,
-        favorites=favorite_spaces,
-        reviews=my_reviews,
-        history=booking_history_data,
-        contacts=emergency_contacts_data
-    )
+        profile=page['profile'],
+        favorites=page['favorites'],
+        reviews=page['reviews'],
+        reviews_next_cursor=page['reviews_next_cursor'],
+        history=page['history'],
+        contacts=page['contacts']
+    ))
+    # Kon section koto shomoy nilo, browser devtools er Timing tab e dekha jay.
+    response.headers['Server-Timing'] = server_timing_header(page['timings'])
+    return response
 
 @traveler_profiles_bp.route("/profile/update", methods=['POST'])
 def update_profile():
@@ -139,8 +137,15 @@ def booking_history():
     # FIX: Query bookings using the correct user_mongo_id
     history = list(db.bookings.find({'user_id': user_mongo_id}))
     
-    # Session theke suggested space (jodi thake) neya hocche.
-    suggested_spaces = session.get('suggested_spaces', None)
+    # Background e hishab kora suggested space (jodi thake) neya hocche. Notun booking er
+    # job ekhono shesh na hole ager (onno city er) result na dekhiye kichu dekhano hoy na.
+    queued_at = session.get('booking_suggestions_queued_at')
+    if queued_at:
+        suggested_spaces = get_queued_suggestions(user_mongo_id, queued_at)
+        if suggested_spaces is not None:
+            session.pop('booking_suggestions_queued_at')
+    else:
+        suggested_spaces = get_user_suggestions(user_mongo_id)
     
     return render_template('booking_history.html', history=history, suggestions=suggested_spaces)
 
@@ -191,11 +196,7 @@ def cancel_booking_profile(booking_id):
     try:
         # Database e booking er status "Cancelled" e update kora hocche.
         # FIX: Query with the correct user_mongo_id
-        result = db.bookings.update_one(
-            {"booking_id": bid, "user_id": user_mongo_id}, # Shudhu ei user er booking e cancel korte parbe.
-            {"$set": {"status": "Cancelled"}}
-        )
-        success = result.modified_count > 0 # Jodi ekta document o update hoy, tahole success.
+        success = cancel_booking(bid, user_mongo_id) # Jodi ekta document o update hoy, tahole success.
     except Exception as e:
         current_app.logger.exception("Error cancelling booking: %s", e)
         success = False
@@ -207,4 +208,4 @@ def cancel_booking_profile(booking_id):
         return jsonify({"success": success, "message": msg})
 
     flash(msg, 'success' if success else 'warning')
-    return redirect(url_for('traveler_profiles.booking_history'))
\ No newline at end of file
+    return redirect(url_for('traveler_profiles.booking_history'))
\ No newline at end of file